@@ -1,9 +1,15 @@
-import requests
 import json
+from imanage_http import iManageHttpClient
 
 class iManageHierarchyLister:
-    def __init__(self, server_url, username, password):
+    # Fields read from each item (sent only if field_selection is enabled)
+    WORKSPACE_FIELDS = ['id', 'name']
+    FOLDER_FIELDS = ['id', 'name']
+    DOCUMENT_FIELDS = ['id', 'name', 'version', 'extension', 'size']
+    
+    def __init__(self, server_url, username, password, field_selection=False, compress_requests=False):
         self.server_url = server_url
+        self.http = iManageHttpClient(field_selection=field_selection, compress_requests=compress_requests)
         self.token = self.authenticate(username, password)
         self.headers = {"Authorization": f"Bearer {self.token}"}
     
@@ -11,7 +17,7 @@ class iManageHierarchyLister:
         auth_url = f"{self.server_url}/work/api/v2/auth/login"
         auth_data = {"username": username, "password": password}
         
-        response = requests.post(auth_url, json=auth_data)
+        response = self.http.post(auth_url, json_body=auth_data, endpoint='login')
         if response.status_code == 200:
             return response.json()['access_token']
         else:
@@ -19,7 +25,7 @@ class iManageHierarchyLister:
     
     def get_workspaces(self, library_id):
         url = f"{self.server_url}/work/api/v2/libraries/{library_id}/workspaces"
-        response = requests.get(url, headers=self.headers)
+        response = self.http.get(url, headers=self.headers, fields=self.WORKSPACE_FIELDS, endpoint='workspaces')
         
         if response.status_code == 200:
             return response.json().get('data', [])
@@ -31,7 +37,7 @@ class iManageHierarchyLister:
         else:
             url = f"{self.server_url}/work/api/v2/libraries/{library_id}/workspaces/{workspace_id}/folders"
             
-        response = requests.get(url, headers=self.headers)
+        response = self.http.get(url, headers=self.headers, fields=self.FOLDER_FIELDS, endpoint='folders')
         
         if response.status_code == 200:
             return response.json().get('data', [])
@@ -43,7 +49,7 @@ class iManageHierarchyLister:
         else:
             url = f"{self.server_url}/work/api/v2/libraries/{library_id}/workspaces/{workspace_id}/documents"
             
-        response = requests.get(url, headers=self.headers)
+        response = self.http.get(url, headers=self.headers, fields=self.DOCUMENT_FIELDS, endpoint='documents')
         
         if response.status_code == 200:
             return response.json().get('data', [])
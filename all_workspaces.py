@@ -1,12 +1,18 @@
 # get_workspaces.py
 
-import requests
 import json
 import urllib3
 from datetime import datetime
+from imanage_http import iManageHttpClient
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Fields read from each library and workspace (sent only if field_selection is enabled)
+LIBRARY_FIELDS = ['id', 'type', 'is_hidden']
+WORKSPACE_FIELDS = ['id', 'name', 'type', 'is_active', 'description']
+
+_http_client = None
+
 def load_config(config_file='config.json'):
     """Load configuration from JSON file"""
     try:
@@ -27,6 +33,14 @@ def load_config(config_file='config.json'):
         print(f"ERROR: Invalid JSON in '{config_file}'")
         return None
 
+def get_http_client(config):
+    """Return the keep-alive HTTP client shared by all requests of this run"""
+    global _http_client
+    
+    if _http_client is None:
+        _http_client = iManageHttpClient.from_config(config, verify_ssl=False)
+    return _http_client
+
 def get_access_token(config):
     """Get OAuth2 access token from iManage"""
     
@@ -45,12 +59,11 @@ def get_access_token(config):
     }
     
     try:
-        response = requests.post(
+        response = get_http_client(config).post(
             token_url,
             data=token_data,
             headers={'Content-Type': 'application/x-www-form-urlencoded'},
-            timeout=30,
-            verify=config.get('verify_ssl', False)
+            endpoint='token'
         )
         
         if response.status_code == 200:
@@ -84,11 +97,11 @@ def get_customer_libraries(config, token_info):
     }
     
     try:
-        response = requests.get(
+        response = get_http_client(config).get(
             libraries_url, 
             headers=headers, 
-            timeout=30,
-            verify=config.get('verify_ssl', False)
+            fields=LIBRARY_FIELDS,
+            endpoint='libraries'
         )
         
         if response.status_code == 200:
@@ -116,11 +129,11 @@ def get_workspaces(config, token_info, library_id):
         print(f"Getting workspaces for library: {library_id}")
         print(f"Request URL: {workspaces_url}")
         
-        response = requests.get(
+        response = get_http_client(config).get(
             workspaces_url, 
             headers=headers, 
-            timeout=30,
-            verify=config.get('verify_ssl', False)
+            fields=WORKSPACE_FIELDS,
+            endpoint='workspaces'
         )
         
         print(f"Response Status: {response.status_code}")
@@ -5,7 +5,12 @@ import json
 import csv
 import os
 import sys
+import time
+from collections import deque
 from datetime import datetime
+from run_metrics import RunMetrics, MetricsExporter
+from resilience import RetryPolicy, DelayedRetryQueue, CircuitBreaker
+from imanage_http import iManageHttpClient
 
 class iManageCustomUploader:
     def __init__(self, config):
@@ -14,8 +19,26 @@ class iManageCustomUploader:
         self.library_id = config['library_id']
         self.custom_table = config['custom_table']
         self.input_file_path = config['input_file_path']
+        self.metrics_port = int(config.get('metrics_port', 0))
+        self.metrics_json_file = config.get('metrics_json_file', '')
+        self.metrics_interval_seconds = float(config.get('metrics_interval_seconds', 10))
+        self.batch_size = max(1, int(config.get('batch_size', 1)))
+        self.accepted_batches = 0
         self.access_token = None
         self.headers = {}
+        self.http = iManageHttpClient.from_config(config)
+        self.metrics = RunMetrics('imanage_custom_upload')
+        self.retry_policy = RetryPolicy(
+            max_attempts=int(config.get('max_attempts', 5)),
+            base_delay=float(config.get('retry_base_seconds', 5)),
+            max_delay=float(config.get('retry_max_seconds', 300))
+        )
+        self.circuit_breaker = CircuitBreaker(
+            failure_rate_threshold=float(config.get('circuit_failure_rate', 0.5)),
+            min_requests=int(config.get('circuit_min_requests', 20)),
+            cooldown_seconds=float(config.get('circuit_cooldown_seconds', 30)),
+            on_state_change=lambda old, new: print(f"Circuit breaker: {old} -> {new}")
+        )
         
     def authenticate(self, config):
         """Authenticate and get access token"""
@@ -32,7 +55,7 @@ class iManageCustomUploader:
         }
         
         try:
-            response = requests.post(token_url, data=token_data, timeout=30)
+            response = self.http.post(token_url, data=token_data, endpoint='token')
             
             if response.status_code == 200:
                 token_response = response.json()
@@ -40,8 +63,7 @@ class iManageCustomUploader:
                 
                 if self.access_token:
                     self.headers = {
-                        'Authorization': f"Bearer {self.access_token}",
-                        'Content-Type': 'application/json'
+                        'Authorization': f"Bearer {self.access_token}"
                     }
                     print("SUCCESS: Authentication successful")
                     return True
@@ -137,7 +159,9 @@ class iManageCustomUploader:
         try:
             print(f"Creating custom record with ID: {api_data.get('id', 'N/A')} (Row {record_data.get('_row_number', 'N/A')})")
             
-            response = requests.post(url, json=api_data, headers=self.headers, timeout=30)
+            self.metrics.request_started()
+            response = self.http.post(url, json_body=api_data, headers=self.headers, endpoint='custom_create')
+            self.metrics.request_finished(response.status_code)
             
             if response.status_code in [200, 201]:
                 print(f"SUCCESS: Custom record created")
@@ -145,7 +169,9 @@ class iManageCustomUploader:
                     'status': 'success',
                     'record_id': api_data.get('id'),
                     'response': response.json() if response.content else None,
-                    'row_number': record_data.get('_row_number')
+                    'row_number': record_data.get('_row_number'),
+                    'http_status': response.status_code,
+                    'transient': False
                 }
             else:
                 print(f"ERROR: Failed to create record - {response.status_code}")
@@ -154,18 +180,97 @@ class iManageCustomUploader:
                     'status': 'failed',
                     'record_id': api_data.get('id'),
                     'error': f"HTTP {response.status_code}: {response.text}",
-                    'row_number': record_data.get('_row_number')
+                    'row_number': record_data.get('_row_number'),
+                    'http_status': response.status_code,
+                    'transient': RetryPolicy.is_transient_status(response.status_code)
                 }
                 
         except Exception as e:
+            self.metrics.request_finished(None)
             print(f"ERROR: Request failed - {e}")
             return {
                 'status': 'failed',
                 'record_id': api_data.get('id'),
                 'error': str(e),
-                'row_number': record_data.get('_row_number')
+                'row_number': record_data.get('_row_number'),
+                'transient': isinstance(e, requests.RequestException)
             }
     
+    def create_custom_records(self, records):
+        """
+        Create several custom records in one request
+        
+        The records are posted as a JSON array. A rejected batch is split in
+        half until the bad rows are isolated, so every row still gets its own
+        result; a single record goes through create_custom_record.
+        """
+        if len(records) == 1 or self.batch_size == 1:
+            # Also the rest of a batch being split once arrays turned out not to be accepted
+            return [self.create_custom_record(record) for record in records]
+        
+        url = f"{self.server}/work/api/v2/customers/{self.customer_id}/libraries/{self.library_id}/customs/{self.custom_table}"
+        api_data = [{k: v for k, v in record.items() if not k.startswith('_')} for record in records]
+        
+        try:
+            print(f"Creating {len(records)} custom records (Rows {records[0].get('_row_number', 'N/A')}-{records[-1].get('_row_number', 'N/A')})")
+            
+            self.metrics.request_started()
+            response = self.http.post(url, json_body=api_data, headers=self.headers, endpoint='custom_create_batch')
+            self.metrics.request_finished(response.status_code)
+            
+        except Exception as e:
+            self.metrics.request_finished(None)
+            print(f"ERROR: Batch request failed - {e}")
+            return [{
+                'status': 'failed',
+                'record_id': data.get('id'),
+                'error': str(e),
+                'row_number': record.get('_row_number'),
+                'transient': isinstance(e, requests.RequestException)
+            } for record, data in zip(records, api_data)]
+        
+        if response.status_code in [200, 201]:
+            print(f"SUCCESS: {len(records)} custom records created")
+            self.accepted_batches += 1
+            body = response.json() if response.content else None
+            if isinstance(body, dict):
+                body = body.get('data', body)
+            items = body if isinstance(body, list) and len(body) == len(records) else [None] * len(records)
+            return [{
+                'status': 'success',
+                'record_id': data.get('id'),
+                'response': item,
+                'row_number': record.get('_row_number'),
+                'http_status': response.status_code,
+                'transient': False
+            } for record, data, item in zip(records, api_data, items)]
+        
+        if RetryPolicy.is_transient_status(response.status_code):
+            print(f"ERROR: Failed to create batch - {response.status_code}")
+            return [{
+                'status': 'failed',
+                'record_id': data.get('id'),
+                'error': f"HTTP {response.status_code}: {response.text}",
+                'row_number': record.get('_row_number'),
+                'http_status': response.status_code,
+                'transient': True
+            } for record, data in zip(records, api_data)]
+        
+        # Rejected: split the batch to isolate the bad rows
+        print(f"Batch rejected ({response.status_code}) - splitting {len(records)} records")
+        middle = len(records) // 2
+        results = self.create_custom_records(records[:middle]) + self.create_custom_records(records[middle:])
+        
+        # Every row went through as a single record and no array ever has, so the
+        # endpoint does not take arrays; a batch that was only too large has halves
+        # that are accepted as arrays
+        if self.batch_size > 1 and self.accepted_batches == 0 \
+                and all(result['status'] == 'success' for result in results):
+            print("Batches are not accepted by this endpoint - sending records one at a time")
+            self.batch_size = 1
+        
+        return results
+    
     def process_bulk_upload(self):
         """Process bulk upload from configured file path"""
         
@@ -177,6 +282,7 @@ class iManageCustomUploader:
         print(f"  Library ID: {self.library_id}")
         print(f"  Custom Table: {self.custom_table}")
         print(f"  Input File: {self.input_file_path}")
+        print(f"  Batch Size: {self.batch_size}")
         print("-" * 50)
         
         # Read the file
@@ -191,21 +297,68 @@ class iManageCustomUploader:
         success_count = 0
         failure_count = 0
         
-        for i, record in enumerate(records, 1):
-            print(f"\nRecord {i}/{len(records)}:")
-            result = self.create_custom_record(record)
-            results.append(result)
+        self.metrics.add_expected(len(records))
+        exporter = None
+        if self.metrics_port or self.metrics_json_file:
+            exporter = MetricsExporter(self.metrics, port=self.metrics_port,
+                                       json_file=self.metrics_json_file,
+                                       interval_seconds=self.metrics_interval_seconds)
+            exporter.start()
+        
+        # Transient failures (timeouts, 429, 5xx) wait in a delayed retry queue
+        # while the remaining records keep flowing
+        pending = deque(records)
+        retry_queue = DelayedRetryQueue()
+        
+        while pending or retry_queue:
+            pending.extendleft(reversed(retry_queue.pop_due()))
+            
+            if not pending:
+                time.sleep(retry_queue.next_due_in())
+                continue
             
-            if result['status'] == 'success':
-                success_count += 1
+            if not self.circuit_breaker.allow_request():
+                wait_seconds = self.circuit_breaker.seconds_until_retry()
+                print(f"Server error rate too high - pausing {wait_seconds:.0f}s")
+                time.sleep(wait_seconds)
+                continue
+            
+            batch = [pending.popleft() for _ in range(min(self.batch_size, len(pending)))]
+            for record in batch:
+                record['_attempts'] = record.get('_attempts', 0) + 1
+            
+            if len(batch) == 1:
+                print(f"\nRecord {len(results) + 1}/{len(records)}:")
             else:
-                failure_count += 1
+                print(f"\nRecords {len(results) + 1}-{len(results) + len(batch)}/{len(records)}:")
+            batch_results = self.create_custom_records(batch)
+            self.circuit_breaker.record(not any(result.get('transient') for result in batch_results))
+            
+            for record, result in zip(batch, batch_results):
+                result['attempts'] = record['_attempts']
+                
+                if result['status'] != 'success' and result.get('transient') \
+                        and self.retry_policy.should_retry(record['_attempts']):
+                    delay = self.retry_policy.delay_for(record['_attempts'])
+                    print(f"Will retry row {record.get('_row_number')} in {delay:.0f}s "
+                          f"(attempt {record['_attempts']}/{self.retry_policy.max_attempts})")
+                    retry_queue.push(record, delay)
+                else:
+                    results.append(result)
+                    
+                    if result['status'] == 'success':
+                        success_count += 1
+                    else:
+                        failure_count += 1
+                    self.metrics.record_file(result['status'] == 'success')
             
             # Brief pause to avoid overwhelming the server
-            if i < len(records):
-                import time
+            if pending or retry_queue:
                 time.sleep(0.5)
         
+        if exporter is not None:
+            exporter.stop()
+        
         # Generate summary
         print("\n" + "=" * 50)
         print("UPLOAD SUMMARY")
@@ -229,7 +382,7 @@ class iManageCustomUploader:
         
         try:
             with open(results_file, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['row_number', 'record_id', 'status', 'error']
+                fieldnames = ['row_number', 'record_id', 'status', 'attempts', 'error']
                 writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
                 
                 writer.writeheader()
@@ -238,6 +391,7 @@ class iManageCustomUploader:
                         'row_number': result.get('row_number', ''),
                         'record_id': result.get('record_id', ''),
                         'status': result.get('status', ''),
+                        'attempts': result.get('attempts', 1),
                         'error': result.get('error', '')
                     })
             
@@ -325,7 +479,22 @@ Configuration File (config.json)
     "customer_id": "your_customer_id",
     "library_id": "ACTIVE",
     "custom_table": "custom1",
-    "input_file_path": "C:\\data\\imanage\\custom1.txt"
+    "input_file_path": "C:\\data\\imanage\\custom1.txt",
+    "metrics_port": 0,
+    "metrics_json_file": "C:\\data\\imanage\\upload_metrics.json",
+    "metrics_interval_seconds": 10,
+    "max_attempts": 5,
+    "retry_base_seconds": 5,
+    "circuit_failure_rate": 0.5,
+    "circuit_cooldown_seconds": 30,
+    "batch_size": 50,
+    "connect_timeout": 10,
+    "timeout": 30,
+    "timeout_factor": 3,
+    "timeout_floor_seconds": 5,
+    "timeout_ceiling_seconds": 300,
+    "compress_requests": false,
+    "field_selection": false
 }
 
 ======================================
@@ -0,0 +1,155 @@
+# imanage_http.py
+
+import gzip
+import json
+import re
+import time
+from typing import Optional, Dict, Any, Iterable
+
+import requests
+from requests.adapters import HTTPAdapter
+from resilience import LatencyTracker
+
+# Path segments that look like ids (they contain a digit, e.g. 12345 or ACTIVE!123.1, but are not v1/v2)
+_ID_SEGMENT = re.compile(r'^(?!v\d+$).*\d')
+
+
+class iManageHttpClient:
+    """
+    Shared HTTP layer for the iManage Work API scripts
+
+    Keeps one pooled keep-alive session instead of opening a new TLS
+    connection per request, asks for gzip/deflate responses, can gzip
+    large JSON request bodies, and can ask the server to return only the
+    fields a caller reads.
+
+    Every request gets a separate connect timeout and a read timeout
+    derived from the recent latencies of its endpoint. Callers should name
+    the endpoint; otherwise it is derived from the method and the URL path
+    with id segments replaced, so per-document URLs share one latency window.
+    """
+
+    def __init__(self, timeout: float = 30, verify_ssl: bool = True, pool_size: int = 10,
+                 compress_requests: bool = False, compress_min_bytes: int = 2048,
+                 field_selection: bool = False, fields_param: str = 'fields',
+                 connect_timeout: float = 10, latency: Optional[LatencyTracker] = None):
+        """
+        Initialize the client
+
+        Args:
+            timeout: Read timeout in seconds until an endpoint has latency samples
+            verify_ssl: Verify server certificates
+            pool_size: Connections kept open per host
+            compress_requests: Gzip JSON bodies of at least compress_min_bytes
+                               (the server must accept Content-Encoding: gzip)
+            compress_min_bytes: Smallest body worth compressing
+            field_selection: Send requested fields as a query parameter
+            fields_param: Query parameter used for field selection
+            connect_timeout: Connect timeout in seconds
+            latency: Latency tracker for adaptive read timeouts (created if not given)
+        """
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.latency = latency or LatencyTracker(default_timeout=timeout)
+        self.compress_requests = compress_requests
+        self.compress_min_bytes = compress_min_bytes
+        self.field_selection = field_selection
+        self.fields_param = fields_param
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.verify = verify_ssl
+        self.session.headers.update({
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate'
+        })
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], verify_ssl: bool = True) -> 'iManageHttpClient':
+        """
+        Create a client from the JSON config used by the scripts
+
+        Args:
+            config: Script configuration
+            verify_ssl: Certificate checking when the config has no verify_ssl entry
+        """
+        return cls(
+            timeout=float(config.get('timeout', 30)),
+            connect_timeout=float(config.get('connect_timeout', 10)),
+            latency=LatencyTracker(
+                default_timeout=float(config.get('timeout', 30)),
+                factor=float(config.get('timeout_factor', 3)),
+                floor=float(config.get('timeout_floor_seconds', 5)),
+                ceiling=float(config.get('timeout_ceiling_seconds', 300))
+            ),
+            verify_ssl=config.get('verify_ssl', verify_ssl),
+            pool_size=int(config.get('http_pool_size', 10)),
+            compress_requests=config.get('compress_requests', False),
+            compress_min_bytes=int(config.get('compress_min_bytes', 2048)),
+            field_selection=config.get('field_selection', False),
+            fields_param=config.get('fields_param', 'fields')
+        )
+
+    def set_token(self, access_token: str, token_type: str = 'Bearer'):
+        """Send the access token with every following request"""
+        self.session.headers['Authorization'] = f"{token_type} {access_token}"
+
+    def request(self, method: str, url: str, json_body: Any = None, fields: Optional[Iterable[str]] = None,
+                params: Optional[Dict[str, Any]] = None, endpoint: Optional[str] = None,
+                **kwargs) -> requests.Response:
+        """
+        Send a request through the shared session
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            json_body: Body to send as JSON (gzipped when large and compression is enabled)
+            fields: Fields the caller reads from the response (used if field selection is enabled)
+            params: Query parameters
+            endpoint: Name used to track latency and derive the read timeout
+                      (defaults to the method and URL path with ids replaced by {id})
+            **kwargs: Passed on to requests (headers, data, timeout, ...)
+
+        Returns:
+            requests.Response
+        """
+        if fields and self.field_selection:
+            params = dict(params or {})
+            params[self.fields_param] = ','.join(fields)
+
+        if json_body is not None:
+            body = json.dumps(json_body, separators=(',', ':')).encode('utf-8')
+            headers = dict(kwargs.pop('headers', None) or {})
+            headers['Content-Type'] = 'application/json'
+            if self.compress_requests and len(body) >= self.compress_min_bytes:
+                body = gzip.compress(body, compresslevel=5)
+                headers['Content-Encoding'] = 'gzip'
+            kwargs['data'] = body
+            kwargs['headers'] = headers
+
+        endpoint = endpoint or self.endpoint_for(method, url)
+        kwargs.setdefault('timeout', (self.connect_timeout, self.latency.timeout_for(endpoint)))
+
+        started = time.monotonic()
+        response = self.session.request(method, url, params=params, **kwargs)
+        self.latency.record(endpoint, time.monotonic() - started)
+        return response
+
+    @staticmethod
+    def endpoint_for(method: str, url: str) -> str:
+        """Return the latency key for a URL, e.g. 'GET /work/api/v2/customers/{id}/documents/{id}'"""
+        path = url.split('?', 1)[0].split('://', 1)[-1]
+        segments = path.split('/')
+        segments[1:] = ['{id}' if _ID_SEGMENT.match(segment) else segment for segment in segments[1:]]
+        return f"{method} {'/'.join(segments)}"
+    
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        self.session.close()
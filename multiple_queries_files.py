@@ -21,10 +21,10 @@ JSON  -- params.json
 
 python script 
 
-import pyodbc
-import pandas as pd
-import json
 import logging
+import time
+from report_export import load_reports, export_reports, print_report_summary
+from resilience import RetryPolicy
 
 # Configure logging
 logging.basicConfig(filename="sql_export.log", level=logging.INFO, 
@@ -36,40 +36,38 @@ database = "YourDatabase"  # Replace with actual database name
 username = "YourUsername"  # Replace with actual SQL login
 password = "YourPassword"  # Replace with actual password
 
+# ⚡ Queries run at the same time (one pooled connection each), seconds before a query is
+# cancelled (0 = no limit; "timeout" in params.json overrides it per query), and attempts per
+# query when the connection drops, the query times out or it is chosen as a deadlock victim
+workers = 4
+query_timeout = 0
+max_attempts = 3
+
+
+def log(message):
+    print(message)
+    logging.info(message)
+
+
 # Load JSON parameters file
 try:
-    with open("params.json", "r") as file:
-        params = json.load(file)
+    reports = load_reports("params.json")
 except Exception as e:
     logging.error(f"Error loading JSON file: {e}")
     print("❌ Error loading JSON file. Check 'sql_export.log' for details.")
     exit()
 
-# Establish connection to SQL Server
-try:
-    conn = pyodbc.connect(f"DRIVER={{SQL Server}};SERVER={server};DATABASE={database};UID={username};PWD={password}")
-except Exception as e:
-    logging.error(f"SQL Server connection failed: {e}")
-    print("❌ Database connection error. Check 'sql_export.log' for details.")
-    exit()
-
-# Execute queries and save output
-for item in params["queries"]:
-    filename = item["filename"]
-    query = item["query"]
-
-    try:
-        df = pd.read_sql(query, conn)
-        df.to_csv(filename, index=False)
-        logging.info(f"✅ Query executed successfully. Output saved to {filename}")
-        print(f"✅ Query result saved to {filename}")
-    except Exception as e:
-        logging.error(f"Query execution failed for {filename}: {e}")
-        print(f"❌ Error executing query for {filename}. Check 'sql_export.log' for details.")
-
-# Close connection
-conn.close()
-logging.info("✅ SQL Server connection closed.")
+# Execute queries concurrently and save output
+started = time.perf_counter()
+results = export_reports(
+    reports,
+    f"DRIVER={{SQL Server}};SERVER={server};DATABASE={database};UID={username};PWD={password}",
+    workers=workers,
+    query_timeout=query_timeout,
+    retry_policy=RetryPolicy(max_attempts=max_attempts, base_delay=5, max_delay=60),
+    log=log
+)
+print_report_summary(results, time.perf_counter() - started, log)
 print("✅ Process completed. Check 'sql_export.log' for details.")
 
 
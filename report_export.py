@@ -0,0 +1,379 @@
+# report_export.py
+
+import csv
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Callable, Any, Iterator, TextIO
+
+from resilience import RetryPolicy
+
+# pyodbc is only needed for SQL Server reports, zstandard only for .zst output
+try:
+    import pyodbc
+except ImportError:
+    pyodbc = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# SQLSTATEs worth another attempt: lost or refused connections, query timeouts, deadlocks
+TRANSIENT_SQLSTATES = {'08001', '08S01', '08004', 'HYT00', 'HYT01', '40001'}
+
+
+@dataclass
+class Report:
+    """One query and the file its result is written to"""
+    query: str
+    filename: str
+    header: bool = True
+    trailing_blank_line: bool = False
+    timeout: Optional[int] = None  # seconds, overrides the engine's query_timeout
+    delimiter: str = ','
+    compression: Optional[str] = None  # 'gzip', 'zstd', 'none', or None to go by the file extension
+
+
+@dataclass
+class ReportResult:
+    """Outcome of exporting one report"""
+    filename: str
+    rows: int = 0
+    seconds: float = 0.0
+    attempts: int = 0
+    error: str = ""
+
+
+def load_reports(params_file: str) -> List[Report]:
+    """
+    Read the query list from a params.json file
+
+    Expected shape: {"queries": [{"filename": ..., "query": ...}, ...]};
+    each entry may also set "header", "trailing_blank_line", "timeout",
+    "delimiter" and "compression".
+    """
+    with open(params_file, 'r', encoding='utf-8') as f:
+        params = json.load(f)
+    return [Report(
+        query=item['query'],
+        filename=item['filename'],
+        header=item.get('header', True),
+        trailing_blank_line=item.get('trailing_blank_line', False),
+        timeout=item.get('timeout'),
+        delimiter=item.get('delimiter', ','),
+        compression=item.get('compression')
+    ) for item in params['queries']]
+
+
+def reports_from_mapping(queries: Dict[str, str], **report_settings) -> List[Report]:
+    """Build reports from a {filename: query} dictionary"""
+    return [Report(query=query, filename=filename, **report_settings) for filename, query in queries.items()]
+
+
+def reports_from_sql_file(sql_file: str, filename_pattern: str = "output_{number}.csv",
+                          **report_settings) -> List[Report]:
+    """
+    Build reports from a flat file of queries separated by semicolons
+
+    The n-th statement in the file is written to filename_pattern with
+    {number} = n; empty statements are skipped but keep their number.
+    """
+    with open(sql_file, 'r', encoding='utf-8') as f:
+        statements = f.read().split(';')
+    return [Report(query=statement.strip(), filename=filename_pattern.format(number=number), **report_settings)
+            for number, statement in enumerate(statements, start=1) if statement.strip()]
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Return True for database errors that may succeed when tried again"""
+    # Wrapped driver errors keep the SQLSTATE on the cause
+    while error is not None:
+        if isinstance(error, TimeoutError):
+            return True
+        sqlstate = error.args[0] if error.args else None
+        if isinstance(sqlstate, str) and sqlstate in TRANSIENT_SQLSTATES:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class ConnectionPool:
+    """
+    Bounded pool of database connections shared by export threads
+
+    Connections are opened lazily up to size and reused afterwards. A
+    connection that failed a query is closed instead of being returned,
+    so the next caller gets a fresh one.
+    """
+
+    def __init__(self, connection_string: str, size: int = 4, connect_timeout: int = 30,
+                 connect: Optional[Callable[..., Any]] = None):
+        """
+        Initialize the pool
+
+        Args:
+            connection_string: pyodbc connection string
+            size: Most connections open at the same time
+            connect_timeout: Login timeout in seconds
+            connect: Connection factory (defaults to pyodbc.connect)
+        """
+        self.connection_string = connection_string
+        self.size = max(1, size)
+        self.connect_timeout = connect_timeout
+        if connect is None and pyodbc is None:
+            raise ImportError("pyodbc is required to export SQL Server reports")
+        self._connect = connect or pyodbc.connect
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    def acquire(self, timeout: Optional[float] = None):
+        """Return an idle connection, or a new one while the pool is below size"""
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No database connection free within {timeout}s")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self._connect(self.connection_string, timeout=self.connect_timeout)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, connection, broken: bool = False):
+        """Return a connection to the pool, closing it if it is broken"""
+        if broken:
+            try:
+                connection.close()
+            except Exception:
+                pass
+        else:
+            self._idle.put(connection)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """Borrow a connection for the duration of a with block"""
+        connection = self.acquire(timeout)
+        broken = False
+        try:
+            yield connection
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self.release(connection, broken)
+
+    def close(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+
+def export_compression(filename: str, compression: Optional[str] = None) -> Optional[str]:
+    """Return 'gzip', 'zstd' or None, from the setting or else the file extension"""
+    if compression is None:
+        lower = filename.lower()
+        compression = 'gzip' if lower.endswith('.gz') else 'zstd' if lower.endswith('.zst') else None
+    if compression in (None, '', 'none'):
+        return None
+    if compression not in ('gzip', 'zstd'):
+        raise ValueError(f"Unknown compression '{compression}' (use 'gzip', 'zstd' or 'none')")
+    if compression == 'zstd' and zstandard is None:
+        raise ImportError("zstandard is required for zstd compressed exports")
+    return compression
+
+
+@contextmanager
+def open_export_file(filename: str, compression: Optional[str] = None) -> Iterator[TextIO]:
+    """
+    Open a text file for an export that only appears once it is complete
+
+    Rows go to filename.tmp, which replaces filename when the with block
+    ends without an error and is removed otherwise, so readers never see
+    a half-written report.
+
+    Args:
+        filename: Final output path
+        compression: 'gzip', 'zstd', 'none', or None to go by the file extension
+    """
+    compression = export_compression(filename, compression)
+    temp_file = f"{filename}.tmp"
+    if compression == 'gzip':
+        file = gzip.open(temp_file, 'wt', encoding='utf-8', newline='', compresslevel=6)
+    elif compression == 'zstd':
+        file = zstandard.open(temp_file, 'wt', encoding='utf-8', newline='')
+    else:
+        file = open(temp_file, 'w', encoding='utf-8', newline='')
+    try:
+        with file:
+            yield file
+        os.replace(temp_file, filename)
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+
+
+def export_cursor(cursor, filename: str, header: bool = True, delimiter: str = ',',
+                  compression: Optional[str] = None, batch_size: int = 10000,
+                  trailing_blank_line: bool = False) -> int:
+    """
+    Stream the result of an executed query into a CSV/TSV file
+
+    Rows are fetched batch_size at a time and written straight away, so
+    memory stays flat however large the result is. NULLs are written as
+    empty fields; the file is written atomically (see open_export_file).
+
+    Args:
+        cursor: DB-API cursor after execute()
+        filename: Output path (.gz or .zst picks the compression unless it is given)
+        header: Write the column names first
+        delimiter: Field separator, e.g. '\\t' for TSV
+        compression: 'gzip', 'zstd', 'none', or None to go by the file extension
+        batch_size: Rows fetched per round trip
+        trailing_blank_line: End the file with an empty line
+
+    Returns:
+        Number of rows written
+    """
+    rows_written = 0
+    with open_export_file(filename, compression) as file:
+        writer = csv.writer(file, delimiter=delimiter, lineterminator=os.linesep)
+        if header:
+            writer.writerow([description[0] for description in cursor.description])
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            writer.writerows(rows)
+            if not rows_written:
+                file.flush()  # the first rows show up without waiting for the rest
+            rows_written += len(rows)
+        if trailing_blank_line:
+            file.write(os.linesep)
+    return rows_written
+
+
+def write_report(connection, report: Report, query_timeout: int = 0, batch_size: int = 10000) -> int:
+    """
+    Run one report query and stream its result to the report file
+
+    Args:
+        connection: Open pyodbc connection
+        report: Query, output file and CSV settings
+        query_timeout: Seconds before the query is cancelled (0 = no limit)
+        batch_size: Rows fetched per round trip
+
+    Returns:
+        Number of rows written
+    """
+    connection.timeout = report.timeout if report.timeout is not None else query_timeout
+    cursor = connection.cursor()
+    try:
+        cursor.execute(report.query)
+        return export_cursor(cursor, report.filename, report.header, report.delimiter, report.compression,
+                             batch_size, report.trailing_blank_line)
+    finally:
+        cursor.close()
+
+
+def export_reports(reports: List[Report], connection_string: str, workers: int = 4,
+                   query_timeout: int = 0, connect_timeout: int = 30, acquire_timeout: float = 600,
+                   batch_size: int = 10000,
+                   retry_policy: Optional[RetryPolicy] = None, log: Callable[[str], None] = print,
+                   connect: Optional[Callable[..., Any]] = None) -> List[ReportResult]:
+    """
+    Export reports concurrently over a bounded connection pool
+
+    Up to workers queries run at the same time, each on its own pooled
+    connection. Queries that fail with a lost connection, a timeout or a
+    deadlock are retried with backoff; other errors fail the report
+    without affecting the rest.
+
+    Args:
+        reports: Queries and output files
+        connection_string: pyodbc connection string
+        workers: Queries run in parallel (and connections opened)
+        query_timeout: Seconds before a query is cancelled (0 = no limit)
+        connect_timeout: Login timeout in seconds
+        acquire_timeout: Seconds a report waits for a free connection
+        batch_size: Rows fetched and written at a time
+        retry_policy: Attempts and backoff for transient errors (3 attempts by default)
+        log: Progress output
+        connect: Connection factory (defaults to pyodbc.connect)
+
+    Returns:
+        One ReportResult per report, in the order given
+    """
+    retry_policy = retry_policy or RetryPolicy(max_attempts=3, base_delay=5, max_delay=60)
+    pool = ConnectionPool(connection_string, workers, connect_timeout, connect)
+
+    def export(report: Report) -> ReportResult:
+        result = ReportResult(report.filename)
+        started = time.perf_counter()
+        while True:
+            result.attempts += 1
+            try:
+                with pool.connection(acquire_timeout) as connection:
+                    result.rows = write_report(connection, report, query_timeout, batch_size)
+                result.error = ""
+                break
+            except Exception as e:
+                result.error = str(e)
+                if is_transient_error(e) and retry_policy.should_retry(result.attempts):
+                    delay = retry_policy.delay_for(result.attempts)
+                    log(f"🔁 {report.filename}: {e} — retrying in {delay:.0f}s "
+                        f"(attempt {result.attempts}/{retry_policy.max_attempts})")
+                    time.sleep(delay)
+                    continue
+                break
+        result.seconds = time.perf_counter() - started
+        if result.error:
+            log(f"❌ Error executing query for {report.filename}: {result.error}")
+        else:
+            log(f"✅ Query result saved to {report.filename} ({result.rows} rows in {result.seconds:.1f}s)")
+        return result
+
+    log(f"🚀 Exporting {len(reports)} reports over up to {pool.size} connections")
+    try:
+        with ThreadPoolExecutor(max_workers=pool.size) as executor:
+            return list(executor.map(export, reports))
+    finally:
+        pool.close()
+
+
+def print_report_summary(results: List[ReportResult], wall_seconds: Optional[float] = None,
+                         log: Callable[[str], None] = print):
+    """Print rows, time and errors per report"""
+    failed = [result for result in results if result.error]
+
+    log("\n" + "=" * 60)
+    log("📊 EXPORT SUMMARY")
+    for result in results:
+        status = "❌" if result.error else "✅"
+        retries = f", {result.attempts} attempts" if result.attempts > 1 else ""
+        log(f"{status} {result.filename}: {result.rows} rows in {result.seconds:.1f}s{retries}")
+    totals = f"Reports: {len(results)}, failed: {len(failed)}, rows: {sum(result.rows for result in results)}, " \
+             f"query time: {sum(result.seconds for result in results):.1f}s"
+    if wall_seconds is not None:
+        totals += f", elapsed: {wall_seconds:.1f}s"
+    log(totals)
+    log("=" * 60)
+
+    for result in failed:
+        log(f"   {result.filename}: {result.error}")
@@ -0,0 +1,251 @@
+# resilience.py
+
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from typing import Optional, Callable, Any, List, Dict
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter for transient request failures"""
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 2.0,
+                 max_delay: float = 300.0, jitter: float = 0.5):
+        """
+        Initialize the retry policy
+
+        Args:
+            max_attempts: Total attempts per item, including the first one
+            base_delay: Delay in seconds before the first retry
+            max_delay: Upper bound for the delay in seconds
+            jitter: Random spread applied to each delay (0.5 = +/- 50%)
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    @staticmethod
+    def is_transient_status(status: Optional[int]) -> bool:
+        """Return True for HTTP statuses worth retrying (429 and 5xx)"""
+        return status is not None and (status == 429 or status >= 500)
+
+    def should_retry(self, attempts: int) -> bool:
+        """Return True if an item that has been tried this many times may be retried"""
+        return attempts < self.max_attempts
+
+    def delay_for(self, attempts: int) -> float:
+        """Return the delay in seconds before the next attempt"""
+        delay = min(self.max_delay, self.base_delay * (2 ** max(attempts - 1, 0)))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class DelayedRetryQueue:
+    """
+    Queue of items that become due for retry after a delay
+
+    Items are kept in a heap ordered by due time, so waiting retries never
+    block items that can be processed now.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, item: Any, delay: float):
+        """Schedule an item to be due after delay seconds"""
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._sequence), item))
+
+    def pop_due(self) -> List[Any]:
+        """Remove and return all items that are due now"""
+        now = time.monotonic()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def next_due_in(self) -> Optional[float]:
+        """Return seconds until the next item is due, or None if the queue is empty"""
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - time.monotonic())
+
+
+class CircuitBreaker:
+    """
+    Pauses new requests while the server error rate is too high
+
+    closed: requests flow and outcomes are tracked over a rolling window.
+    open: the failure rate exceeded the threshold; requests are refused
+          until the cooldown has passed.
+    half_open: a few probe requests are allowed; a success closes the
+               circuit, a failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_rate_threshold: float = 0.5, window_seconds: float = 60,
+                 min_requests: int = 20, cooldown_seconds: float = 30, half_open_probes: int = 1,
+                 on_state_change: Optional[Callable[[str, str], None]] = None):
+        """
+        Initialize the circuit breaker
+
+        Args:
+            failure_rate_threshold: Failure share in the window that opens the circuit
+            window_seconds: Rolling window for the failure rate
+            min_requests: Minimum outcomes in the window before the circuit can open
+            cooldown_seconds: Time the circuit stays open before probing
+            half_open_probes: Concurrent probe requests allowed while half open
+            on_state_change: Called with (old_state, new_state) on every transition
+        """
+        self.failure_rate_threshold = failure_rate_threshold
+        self.window_seconds = window_seconds
+        self.min_requests = min_requests
+        self.cooldown_seconds = cooldown_seconds
+        self.half_open_probes = max(1, half_open_probes)
+        self.on_state_change = on_state_change
+        self.state = self.CLOSED
+        self._outcomes = deque()  # (timestamp, success)
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _set_state(self, new_state: str):
+        old_state = self.state
+        self.state = new_state
+        if old_state != new_state and self.on_state_change:
+            self.on_state_change(old_state, new_state)
+
+    def allow_request(self) -> bool:
+        """Return True if a new request may be sent now"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown_seconds:
+                    return False
+                self._probes_in_flight = 0
+                self._set_state(self.HALF_OPEN)
+
+            if self.state == self.HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_probes:
+                    return False
+                self._probes_in_flight += 1
+
+            return True
+
+    def seconds_until_retry(self) -> float:
+        """Return how long to wait before asking allow_request again"""
+        with self._lock:
+            if self.state == self.OPEN:
+                return max(0.1, self.cooldown_seconds - (time.monotonic() - self._opened_at))
+            return 0.5
+
+    def record(self, success: bool):
+        """
+        Record the outcome of a request
+
+        Args:
+            success: False for server-side or transient failures; client
+                     errors such as 400/404 should be recorded as success
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if success:
+                    self._outcomes.clear()
+                    self._set_state(self.CLOSED)
+                else:
+                    self._opened_at = now
+                    self._set_state(self.OPEN)
+                return
+
+            self._outcomes.append((now, success))
+            cutoff = now - self.window_seconds
+            while self._outcomes and self._outcomes[0][0] < cutoff:
+                self._outcomes.popleft()
+
+            if self.state == self.CLOSED and len(self._outcomes) >= self.min_requests:
+                failures = sum(1 for _, ok in self._outcomes if not ok)
+                if failures / len(self._outcomes) >= self.failure_rate_threshold:
+                    self._opened_at = now
+                    self._set_state(self.OPEN)
+
+
+class LatencyTracker:
+    """
+    Rolling latency distribution per endpoint, used to derive read timeouts
+
+    The read timeout for an endpoint is the chosen percentile of its recent
+    latencies times factor, clamped to [floor, ceiling]. Endpoints with
+    fewer than min_samples recorded calls use the default timeout, so a
+    fresh run behaves like a fixed timeout until it has data.
+    """
+
+    def __init__(self, default_timeout: float = 30, factor: float = 3.0, floor: float = 5,
+                 ceiling: float = 300, window: int = 200, min_samples: int = 20, percentile: float = 0.99):
+        """
+        Initialize the tracker
+
+        Args:
+            default_timeout: Read timeout used until an endpoint has min_samples
+            factor: Multiplier applied to the percentile latency
+            floor: Smallest timeout handed out
+            ceiling: Largest timeout handed out
+            window: Recent latencies kept per endpoint
+            min_samples: Latencies needed before the timeout adapts
+            percentile: Percentile of the window used (0.99 = p99)
+        """
+        self.default_timeout = default_timeout
+        self.factor = factor
+        self.floor = floor
+        self.ceiling = max(ceiling, floor)
+        self.window = max(1, window)
+        self.min_samples = max(1, min_samples)
+        self.percentile = percentile
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float):
+        """Record the latency of a completed call"""
+        with self._lock:
+            samples = self._samples.get(endpoint)
+            if samples is None:
+                samples = self._samples[endpoint] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def latency_percentile(self, endpoint: str) -> Optional[float]:
+        """Return the configured percentile latency, or None without enough samples"""
+        with self._lock:
+            samples = self._samples.get(endpoint)
+            if not samples or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))]
+
+    def timeout_for(self, endpoint: str) -> float:
+        """Return the read timeout in seconds for the next call to endpoint"""
+        latency = self.latency_percentile(endpoint)
+        if latency is None:
+            return self.default_timeout
+        return min(self.ceiling, max(self.floor, latency * self.factor))
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Return sample count, percentile latency and current timeout per endpoint"""
+        with self._lock:
+            endpoints = list(self._samples)
+        return {
+            endpoint: {
+                'samples': len(self._samples[endpoint]),
+                'latency_percentile': self.latency_percentile(endpoint),
+                'timeout': round(self.timeout_for(endpoint), 3)
+            }
+            for endpoint in endpoints
+        }
@@ -0,0 +1,247 @@
+# run_metrics.py
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Callable, Dict, Any
+
+
+class RunMetrics:
+    """
+    Thread-safe progress counters for a long-running import or upload
+
+    Rates are computed over a rolling window so a throughput drop shows up
+    within a minute instead of being averaged away over a 10-hour run.
+    """
+
+    def __init__(self, name: str, rate_window_seconds: int = 60):
+        """
+        Initialize the counters
+
+        Args:
+            name: Metric name prefix, e.g. 'imanage_import'
+            rate_window_seconds: Window used for files/s and bytes/s
+        """
+        self.name = name
+        self.rate_window_seconds = rate_window_seconds
+        self.started_at = time.time()
+        self.files_succeeded = 0
+        self.files_failed = 0
+        self.bytes_done = 0
+        self.in_flight = 0
+        self.expected_files = 0
+        self.expected_bytes = 0
+        self.status_counts: Dict[str, int] = {}
+        self.queue_depth_source: Optional[Callable[[], int]] = None
+        self._completions = deque()  # (timestamp, bytes) within the rate window
+        self._lock = threading.Lock()
+
+    def add_expected(self, files: int, total_bytes: int = 0):
+        """Add work that is known to be coming (used for the ETA)"""
+        with self._lock:
+            self.expected_files += files
+            self.expected_bytes += total_bytes
+
+    def request_started(self):
+        """Mark a request as in flight"""
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self, status: Optional[int] = None):
+        """
+        Mark a request as finished
+
+        Args:
+            status: HTTP status code, or None if no response was received
+        """
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            key = str(status) if status else 'error'
+            self.status_counts[key] = self.status_counts.get(key, 0) + 1
+
+    def record_file(self, success: bool, size: int = 0):
+        """Record a finished file or record"""
+        now = time.time()
+        with self._lock:
+            if success:
+                self.files_succeeded += 1
+                self.bytes_done += size
+            else:
+                self.files_failed += 1
+            self._completions.append((now, size if success else 0))
+            self._prune(now)
+
+    def _prune(self, now: float):
+        cutoff = now - self.rate_window_seconds
+        while self._completions and self._completions[0][0] < cutoff:
+            self._completions.popleft()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the current metrics as a dictionary"""
+        now = time.time()
+        queue_depth = 0
+        if self.queue_depth_source is not None:
+            try:
+                queue_depth = self.queue_depth_source()
+            except Exception:
+                queue_depth = 0
+
+        with self._lock:
+            self._prune(now)
+            window = min(self.rate_window_seconds, max(now - self.started_at, 1e-6))
+            files_per_second = len(self._completions) / window
+            bytes_per_second = sum(size for _, size in self._completions) / window
+
+            files_done = self.files_succeeded + self.files_failed
+            requests = sum(self.status_counts.values())
+            errors = sum(count for status, count in self.status_counts.items()
+                         if status == 'error' or int(status) >= 400)
+
+            eta_seconds = None
+            remaining_bytes = self.expected_bytes - self.bytes_done
+            remaining_files = self.expected_files - files_done
+            if self.expected_bytes and bytes_per_second > 0:
+                eta_seconds = max(remaining_bytes, 0) / bytes_per_second
+            elif self.expected_files and files_per_second > 0:
+                eta_seconds = max(remaining_files, 0) / files_per_second
+
+            return {
+                'name': self.name,
+                'elapsed_seconds': round(now - self.started_at, 1),
+                'files_succeeded': self.files_succeeded,
+                'files_failed': self.files_failed,
+                'bytes_done': self.bytes_done,
+                'expected_files': self.expected_files,
+                'expected_bytes': self.expected_bytes,
+                'files_per_second': round(files_per_second, 3),
+                'bytes_per_second': round(bytes_per_second, 1),
+                'in_flight': self.in_flight,
+                'queue_depth': queue_depth,
+                'requests_by_status': dict(self.status_counts),
+                'error_rate': round(errors / requests, 4) if requests else 0.0,
+                'eta_seconds': round(eta_seconds) if eta_seconds is not None else None
+            }
+
+    def to_prometheus(self) -> str:
+        """Return the current metrics in Prometheus text exposition format"""
+        snap = self.snapshot()
+        prefix = self.name
+        lines = []
+
+        def add(metric, metric_type, value, help_text):
+            lines.append(f"# HELP {prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {prefix}_{metric} {metric_type}")
+            lines.append(f"{prefix}_{metric} {value}")
+
+        add('files_succeeded_total', 'counter', snap['files_succeeded'], 'Files completed successfully')
+        add('files_failed_total', 'counter', snap['files_failed'], 'Files that failed')
+        add('bytes_total', 'counter', snap['bytes_done'], 'Bytes uploaded successfully')
+        add('files_per_second', 'gauge', snap['files_per_second'], 'Completed files per second (rolling window)')
+        add('bytes_per_second', 'gauge', snap['bytes_per_second'], 'Uploaded bytes per second (rolling window)')
+        add('in_flight_requests', 'gauge', snap['in_flight'], 'Requests currently in flight')
+        add('queue_depth', 'gauge', snap['queue_depth'], 'Items waiting to be processed')
+        add('error_rate', 'gauge', snap['error_rate'], 'Share of requests that failed')
+        add('eta_seconds', 'gauge', snap['eta_seconds'] if snap['eta_seconds'] is not None else 'NaN',
+            'Estimated seconds until the known work is done')
+
+        lines.append(f"# HELP {prefix}_requests_total Requests by HTTP status")
+        lines.append(f"# TYPE {prefix}_requests_total counter")
+        for status, count in sorted(snap['requests_by_status'].items()):
+            lines.append(f'{prefix}_requests_total{{status="{status}"}} {count}')
+
+        return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """
+    Publishes RunMetrics on a local HTTP endpoint and/or a JSON file
+
+    The HTTP endpoint serves Prometheus text on /metrics and JSON on
+    /metrics.json. The JSON file is rewritten atomically every interval.
+    """
+
+    def __init__(self, metrics: RunMetrics, port: int = 0, json_file: str = "",
+                 interval_seconds: float = 10, host: str = '127.0.0.1'):
+        """
+        Initialize the exporter
+
+        Args:
+            metrics: Metrics to publish
+            port: HTTP port (0 disables the endpoint)
+            json_file: JSON file path (empty disables the file)
+            interval_seconds: How often the JSON file is rewritten
+            host: Interface the HTTP endpoint listens on
+        """
+        self.metrics = metrics
+        self.port = port
+        self.json_file = json_file
+        self.interval_seconds = interval_seconds
+        self.host = host
+        self._server = None
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """Start the HTTP endpoint and JSON writer in background threads"""
+        if self.port:
+            metrics = self.metrics
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.startswith('/metrics.json'):
+                        body = json.dumps(metrics.snapshot()).encode('utf-8')
+                        content_type = 'application/json'
+                    elif self.path.startswith('/metrics'):
+                        body = metrics.to_prometheus().encode('utf-8')
+                        content_type = 'text/plain; version=0.0.4'
+                    else:
+                        self.send_error(404)
+                        return
+                    self.send_response(200)
+                    self.send_header('Content-Type', content_type)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+            self._server.daemon_threads = True
+            thread = threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+            print(f"📈 Metrics available at http://{self.host}:{self._server.server_address[1]}/metrics")
+
+        if self.json_file:
+            thread = threading.Thread(target=self._write_json_loop, name='metrics-json', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+            print(f"📈 Metrics written to {self.json_file} every {self.interval_seconds}s")
+
+    def write_json(self):
+        """Rewrite the JSON metrics file atomically"""
+        temp_file = f"{self.json_file}.tmp"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.metrics.snapshot(), f, indent=2)
+            os.replace(temp_file, self.json_file)
+        except Exception as e:
+            print(f"⚠️  Metrics file error: {e}")
+
+    def _write_json_loop(self):
+        while not self._stop.wait(self.interval_seconds):
+            self.write_json()
+
+    def stop(self):
+        """Stop publishing, writing the JSON file one last time"""
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self.json_file:
+            self.write_json()
@@ -0,0 +1,1721 @@
+# sqlite_migration.py
+
+import os
+import queue
+import re
+import sqlite3
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import List, Iterator, Tuple, Callable, Optional, Dict, Any
+from xml.sax.saxutils import escape as xml_escape
+
+# pyodbc is only needed for SQL Server targets, duckdb only for the DuckDB test target
+try:
+    import pyodbc
+except ImportError:
+    pyodbc = None
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# pandas lets DuckDB take a whole batch at once instead of binding rows one by one
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+
+@dataclass
+class TableResult:
+    """Outcome of migrating one SQLite table"""
+    source_db: str
+    table_name: str
+    target_table: str
+    rows: int = 0
+    seconds: float = 0.0
+    error: str = ""
+    # Seconds spent per phase: schema, read, convert, write, finish, indexes
+    phase_seconds: Dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class MigrationOptions:
+    """Settings shared by all tables of a migration run"""
+    batch_size: int = 1000
+    preserve_types: bool = True
+    sample_rows: int = 0
+    workers: int = 1
+    max_target_connections: int = 0
+    use_processes: bool = False
+    writer: str = 'executemany'
+    staging_dir: str = ''
+    bcp_path: str = 'bcp'
+    incremental: bool = False
+    watermark_columns: Dict[str, str] = field(default_factory=dict)
+    upsert: bool = False
+    read_workers: int = 1
+    read_range_rows: int = 200000
+    parallel_read_min_rows: int = 1000000
+    mmap_size_mb: int = 1024
+    cache_size_mb: int = 256
+    immutable: bool = False
+
+
+@dataclass
+class ColumnMapping:
+    """SQLite column and the SQL Server type chosen for it"""
+    name: str
+    declared_type: str
+    sql_type: str
+    nullable: bool = True
+
+
+@dataclass
+class IndexMapping:
+    """SQLite index to recreate on the target table"""
+    name: str
+    columns: List[str]
+    unique: bool = False
+
+
+@dataclass
+class TableSchema:
+    """Target definition of one migrated table"""
+    columns: List[ColumnMapping]
+    primary_key: List[str] = field(default_factory=list)
+    indexes: List[IndexMapping] = field(default_factory=list)
+
+
+def sql_server_connection_string(server: str, database: str, username: str, password: str,
+                                 driver: str = 'SQL Server') -> str:
+    """Build the pyodbc connection string used by the migration scripts"""
+    return f'DRIVER={{{driver}}};SERVER={server};DATABASE={database};UID={username};PWD={password}'
+
+
+def quote_sqlite(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def quote_sql_server(name: str) -> str:
+    return '[' + name.replace(']', ']]') + ']'
+
+
+def key_range_filter(quoted_key: str, low: Any, high: Any) -> Tuple[str, List[Any]]:
+    """Return a WHERE clause (or '') and its parameters for low <= key < high; a None bound is open"""
+    conditions, parameters = [], []
+    if low is not None:
+        conditions.append(f"{quoted_key} >= ?")
+        parameters.append(low)
+    if high is not None:
+        conditions.append(f"{quoted_key} < ?")
+        parameters.append(high)
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), parameters
+
+
+def open_sqlite_reader(db_file: str, options: Optional[MigrationOptions] = None) -> sqlite3.Connection:
+    """
+    Open a read-only SQLite connection tuned for large scans
+
+    The file is opened with mode=ro, memory-mapped up to mmap_size_mb and
+    given a cache of cache_size_mb. With options.immutable SQLite also
+    skips all locking and change detection, which is only safe while
+    nothing else writes to the file.
+    """
+    options = options or MigrationOptions()
+    uri = Path(os.path.abspath(db_file)).as_uri() + '?mode=ro' + ('&immutable=1' if options.immutable else '')
+    # Workers may hand a reader to another thread to close
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    conn.execute(f"PRAGMA mmap_size = {int(options.mmap_size_mb) * 1024 * 1024}")
+    conn.execute(f"PRAGMA cache_size = -{int(options.cache_size_mb) * 1024}")
+    return conn
+
+
+def has_rowid(conn_sqlite: sqlite3.Connection, table_name: str) -> bool:
+    """Return False for WITHOUT ROWID tables"""
+    try:
+        conn_sqlite.execute(f"SELECT rowid FROM {quote_sqlite(table_name)} LIMIT 1").fetchall()
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def list_tables(conn_sqlite: sqlite3.Connection) -> List[str]:
+    """Return the user tables of a SQLite database"""
+    cursor = conn_sqlite.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
+    return [row[0] for row in cursor.fetchall()]
+
+
+def estimate_rows(conn_sqlite: sqlite3.Connection, table_name: str) -> int:
+    """
+    Cheap row-count estimate used to schedule the largest tables first
+
+    MAX(rowid) is a single index lookup, unlike COUNT(*), which scans the
+    whole table. Tables without a rowid fall back to COUNT(*).
+    """
+    try:
+        value = conn_sqlite.execute(f"SELECT MAX(rowid) FROM {quote_sqlite(table_name)}").fetchone()[0]
+    except sqlite3.OperationalError:
+        value = conn_sqlite.execute(f"SELECT COUNT(*) FROM {quote_sqlite(table_name)}").fetchone()[0]
+    return int(value or 0)
+
+
+def read_batches(conn_sqlite: sqlite3.Connection, table_name: str, batch_size: int,
+                 watermark_column: Optional[str] = None, after: Any = None) -> Tuple[List[str], Iterator[List[tuple]]]:
+    """
+    Stream a table in batches
+
+    With a watermark column the rows come in ascending order of that
+    column, each with its value appended as an extra last field, and only
+    rows above `after` are read.
+
+    Args:
+        conn_sqlite: Open SQLite connection
+        table_name: Table to read
+        batch_size: Rows per batch
+        watermark_column: Monotonic column (e.g. rowid) for incremental reads
+        after: Highest value already migrated (None = read from the start)
+
+    Returns:
+        Tuple of (column names without the watermark, iterator of row batches)
+    """
+    query = f"SELECT * FROM {quote_sqlite(table_name)}"
+    parameters = ()
+    if watermark_column:
+        watermark = watermark_column if watermark_column.lower() == 'rowid' else quote_sqlite(watermark_column)
+        query = f"SELECT *, {watermark} FROM {quote_sqlite(table_name)}"
+        if after is not None:
+            query += f" WHERE {watermark} > ?"
+            parameters = (after,)
+        query += f" ORDER BY {watermark}"
+
+    cursor = conn_sqlite.execute(query, parameters)
+    columns = [description[0] for description in cursor.description]
+    if watermark_column:
+        columns = columns[:-1]
+
+    def batches():
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+    return columns, batches()
+
+
+# Column lengths handed out for text columns; anything longer becomes NVARCHAR(MAX)
+NVARCHAR_SIZES = (50, 100, 255, 500, 1000, 2000, 4000)
+
+# Longest NVARCHAR that fits a SQL Server index key (900 bytes)
+KEY_NVARCHAR_LENGTH = 450
+
+# Aggregates per column in one statistics query; keeps well under SQLite's result column limit
+STATISTICS_COLUMNS_PER_QUERY = 100
+
+INT_MIN, INT_MAX = -2 ** 31, 2 ** 31 - 1
+
+
+def sqlite_affinity(declared_type: str) -> str:
+    """Return the SQLite type affinity of a declared column type"""
+    declared = (declared_type or '').upper()
+    if 'INT' in declared:
+        return 'INTEGER'
+    if any(name in declared for name in ('CHAR', 'CLOB', 'TEXT')):
+        return 'TEXT'
+    if not declared or 'BLOB' in declared:
+        return 'BLOB'
+    if any(name in declared for name in ('REAL', 'FLOA', 'DOUB')):
+        return 'REAL'
+    return 'NUMERIC'
+
+
+def _accepts_datetime(value) -> int:
+    # 1 if the DATETIME2 converter takes the value; SQLite's datetime() also takes '2024-02-30' and '24:00'
+    if not isinstance(value, str):
+        return 0
+    try:
+        _to_datetime(value)
+        return 1
+    except ValueError:
+        return 0
+
+
+def _register_date_check(conn_sqlite: sqlite3.Connection):
+    # SQL function for the date statistics, so a column is only typed as a date if every value converts
+    conn_sqlite.create_function('migration_is_datetime', 1, _accepts_datetime, deterministic=True)
+
+
+def column_statistics(conn_sqlite: sqlite3.Connection, table_name: str, columns: List[str],
+                      sample_rows: int = 0) -> Tuple[Dict[str, Dict[str, Any]], bool]:
+    """
+    Collect the value types, integer range and longest value of each column
+
+    SQLite columns can hold any type whatever they were declared as, so
+    the target types are chosen from what is actually stored.
+
+    Args:
+        conn_sqlite: Open SQLite connection
+        table_name: Table to inspect
+        columns: Column names
+        sample_rows: Rows inspected from the start of the table (0 = whole table)
+
+    Returns:
+        Tuple of (statistics per column, True if every row was inspected)
+    """
+    source = quote_sqlite(table_name)
+    if sample_rows > 0:
+        source = f"(SELECT * FROM {source} LIMIT {int(sample_rows)})"
+    _register_date_check(conn_sqlite)
+
+    statistics = {}
+    complete = True
+    keys = ('integers', 'reals', 'texts', 'blobs', 'min_integer', 'max_integer',
+            'max_length', 'dates', 'has_time')
+
+    for start in range(0, len(columns), STATISTICS_COLUMNS_PER_QUERY):
+        chunk = columns[start:start + STATISTICS_COLUMNS_PER_QUERY]
+        aggregates = []
+        for column in chunk:
+            name = quote_sqlite(column)
+            aggregates += [
+                f"SUM(typeof({name}) = 'integer')",
+                f"SUM(typeof({name}) = 'real')",
+                f"SUM(typeof({name}) = 'text')",
+                f"SUM(typeof({name}) = 'blob')",
+                f"MIN(CASE WHEN typeof({name}) = 'integer' THEN {name} END)",
+                f"MAX(CASE WHEN typeof({name}) = 'integer' THEN {name} END)",
+                # Bytes of the UTF-8 text are never fewer than its UTF-16 code units
+                f"MAX(length(CAST({name} AS BLOB)))",
+                f"SUM(typeof({name}) = 'text' AND {name} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*' "
+                f"AND migration_is_datetime({name}))",
+                f"MAX(typeof({name}) = 'text' AND length({name}) > 10)"
+            ]
+        row = conn_sqlite.execute(f"SELECT COUNT(*), {', '.join(aggregates)} FROM {source}").fetchone()
+        rows = row[0]
+        if sample_rows > 0 and rows >= sample_rows:
+            complete = False
+        for index, column in enumerate(chunk):
+            values = row[1 + index * len(keys):1 + (index + 1) * len(keys)]
+            stats = {key: value or 0 for key, value in zip(keys, values)}
+            stats['nulls'] = rows - (stats['integers'] + stats['reals'] + stats['texts'] + stats['blobs'])
+            statistics[column] = stats
+
+    return statistics, complete
+
+
+def _nvarchar_type(max_length: int, complete: bool) -> str:
+    # A sample may have missed longer values
+    if not complete:
+        return "NVARCHAR(MAX)"
+    for size in NVARCHAR_SIZES:
+        if max_length <= size:
+            return f"NVARCHAR({size})"
+    return "NVARCHAR(MAX)"
+
+
+def choose_sql_type(declared_type: str, stats: Dict[str, Any], complete: bool) -> str:
+    """
+    Pick the SQL Server type for a column from its declared type and stored values
+
+    Args:
+        declared_type: Type from the SQLite CREATE TABLE (may be empty)
+        stats: Column statistics from column_statistics
+        complete: True if the statistics cover every row
+
+    Returns:
+        SQL Server column type
+    """
+    declared = (declared_type or '').upper()
+    affinity = sqlite_affinity(declared_type)
+    values = stats['integers'] + stats['reals'] + stats['texts'] + stats['blobs']
+
+    if values == 0:
+        if affinity == 'INTEGER':
+            return "BIGINT"
+        if affinity == 'REAL':
+            return "FLOAT"
+        if 'BLOB' in declared:
+            return "VARBINARY(MAX)"
+        return _nvarchar_type(0, True) if complete else "NVARCHAR(MAX)"
+
+    if stats['blobs'] == values:
+        return "VARBINARY(MAX)"
+
+    if stats['integers'] == values:
+        if 'BOOL' in declared and stats['min_integer'] >= 0 and stats['max_integer'] <= 1:
+            return "BIT"
+        if complete and 'BIG' not in declared and \
+                INT_MIN <= stats['min_integer'] and stats['max_integer'] <= INT_MAX:
+            return "INT"
+        return "BIGINT"
+
+    if stats['integers'] + stats['reals'] == values:
+        return "FLOAT"
+
+    if stats['texts'] == values and stats['dates'] == values:
+        if not stats['has_time'] and 'TIME' not in declared:
+            return "DATE"
+        return "DATETIME2"
+
+    # Mixed or plain text; Python may print floats a few digits longer than SQLite does
+    max_length = stats['max_length'] + (8 if stats['reals'] else 0)
+    return _nvarchar_type(max_length, complete)
+
+
+def _key_column_type(sql_type: str, stats: Dict[str, Any], complete: bool) -> Optional[str]:
+    # Column type usable in a primary key or index, or None if the values are too long
+    if sql_type == "VARBINARY(MAX)":
+        return None
+    if not sql_type.startswith("NVARCHAR"):
+        return sql_type
+    size = sql_type[len("NVARCHAR("):-1]
+    if size != 'MAX' and int(size) <= KEY_NVARCHAR_LENGTH:
+        return sql_type
+    needed = stats['max_length'] * (1 if complete else 2)
+    return f"NVARCHAR({KEY_NVARCHAR_LENGTH})" if needed <= KEY_NVARCHAR_LENGTH else None
+
+
+def _type_violation_sql(column: ColumnMapping) -> Optional[str]:
+    # SQL that is true if a stored value does not fit the column, or None if every value fits
+    name, sql_type = quote_sqlite(column.name), column.sql_type
+    if sql_type in ("INT", "BIGINT", "BIT"):
+        condition = f"typeof({name}) <> 'integer'"
+        if sql_type == "INT":
+            condition += f" OR {name} NOT BETWEEN {INT_MIN} AND {INT_MAX}"
+        elif sql_type == "BIT":
+            condition += f" OR {name} NOT IN (0, 1)"
+    elif sql_type == "FLOAT":
+        condition = f"typeof({name}) NOT IN ('integer', 'real')"
+    elif sql_type in ("DATE", "DATETIME2"):
+        condition = (f"typeof({name}) <> 'text' OR {name} NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*' "
+                     f"OR NOT migration_is_datetime({name})")
+        if sql_type == "DATE":
+            condition += f" OR length({name}) > 10"
+    elif sql_type == "VARBINARY(MAX)":
+        condition = f"typeof({name}) <> 'blob'"
+    elif sql_type.startswith("NVARCHAR(") and sql_type != "NVARCHAR(MAX)":
+        condition = f"length(CAST({name} AS BLOB)) > {int(sql_type[len('NVARCHAR('):-1])}"
+    else:
+        return f"MAX({name} IS NULL)" if not column.nullable else None
+    if not column.nullable:
+        return f"MAX({name} IS NULL OR ({condition}))"
+    return f"MAX({name} IS NOT NULL AND ({condition}))"
+
+
+def columns_outside_types(conn_sqlite: sqlite3.Connection, table_name: str,
+                          columns: List[ColumnMapping]) -> List[str]:
+    """
+    Return the columns holding a value anywhere in the table that does not fit their chosen type or nullability
+
+    Used when the types came from a sample: one pass over the whole table
+    with a single check per column, cheaper than full statistics.
+    """
+    _register_date_check(conn_sqlite)
+    checks = [(column.name, _type_violation_sql(column)) for column in columns]
+    checks = [(name, check) for name, check in checks if check is not None]
+    outside = []
+    for start in range(0, len(checks), STATISTICS_COLUMNS_PER_QUERY):
+        chunk = checks[start:start + STATISTICS_COLUMNS_PER_QUERY]
+        row = conn_sqlite.execute(
+            f"SELECT {', '.join(check for _, check in chunk)} FROM {quote_sqlite(table_name)}").fetchone()
+        outside += [name for (name, _), violated in zip(chunk, row) if violated]
+    return outside
+
+
+def map_table_schema(conn_sqlite: sqlite3.Connection, table_name: str, sample_rows: int = 0,
+                     log: Callable[[str], None] = print) -> TableSchema:
+    """
+    Map a SQLite table to sized SQL Server columns, its primary key and indexes
+
+    Args:
+        conn_sqlite: Open SQLite connection
+        table_name: Table to map
+        sample_rows: Rows inspected to choose the types (0 = whole table). With
+                     a sample, text columns become NVARCHAR(MAX) and any column
+                     with a value elsewhere in the table that does not fit its
+                     type falls back to NVARCHAR(MAX), so the load cannot fail on it
+        log: Output for keys and indexes that cannot be carried over
+
+    Returns:
+        TableSchema with one ColumnMapping per column in SELECT * order
+    """
+    table_info = conn_sqlite.execute(f"PRAGMA table_info({quote_sqlite(table_name)})").fetchall()
+    names = [row[1] for row in table_info]
+    statistics, complete = column_statistics(conn_sqlite, table_name, names, sample_rows)
+
+    columns = []
+    by_name = {}
+    for _, name, declared_type, not_null, _, _ in table_info:
+        mapping = ColumnMapping(name, declared_type or '',
+                                choose_sql_type(declared_type, statistics[name], complete),
+                                nullable=not not_null)
+        columns.append(mapping)
+        by_name[name] = mapping
+
+    schema = TableSchema(columns)
+
+    def fit_key(key_columns: List[str]) -> bool:
+        key_types = [_key_column_type(by_name[name].sql_type, statistics[name], complete) for name in key_columns]
+        if None in key_types:
+            return False
+        for name, key_type in zip(key_columns, key_types):
+            by_name[name].sql_type = key_type
+        return True
+
+    primary_key = [row[1] for row in sorted((row for row in table_info if row[5]), key=lambda row: row[5])]
+    if primary_key:
+        if any(statistics[name]['nulls'] for name in primary_key):
+            log(f"⚠️ {table_name}: primary key column holds NULLs—created without primary key.")
+        elif not fit_key(primary_key):
+            log(f"⚠️ {table_name}: primary key values too long for an index key—created without primary key.")
+        else:
+            schema.primary_key = primary_key
+            for name in primary_key:
+                by_name[name].nullable = False
+
+    for index_row in conn_sqlite.execute(f"PRAGMA index_list({quote_sqlite(table_name)})").fetchall():
+        index_name, unique = index_row[1], bool(index_row[2])
+        origin = index_row[3] if len(index_row) > 3 else 'c'
+        partial = bool(index_row[4]) if len(index_row) > 4 else False
+        if origin == 'pk':
+            continue
+        index_columns = [row[2] for row in
+                         conn_sqlite.execute(f"PRAGMA index_info({quote_sqlite(index_name)})").fetchall()]
+        if partial or not index_columns or None in index_columns:
+            log(f"⚠️ {table_name}: index {index_name} uses expressions or a WHERE clause—skipped.")
+            continue
+        if not fit_key(index_columns):
+            log(f"⚠️ {table_name}: index {index_name} values too long for an index key—skipped.")
+            continue
+        schema.indexes.append(IndexMapping(index_name, index_columns, unique))
+
+    if not complete:
+        for name in columns_outside_types(conn_sqlite, table_name, columns):
+            log(f"⚠️ {table_name}: {name} holds values outside the sample that do not fit "
+                f"{by_name[name].sql_type}—using NVARCHAR(MAX).")
+            by_name[name].sql_type = "NVARCHAR(MAX)"
+            if name in schema.primary_key:
+                log(f"⚠️ {table_name}: created without primary key.")
+                for key_name in schema.primary_key:
+                    by_name[key_name].nullable = True
+                schema.primary_key = []
+            dropped = [index.name for index in schema.indexes if name in index.columns]
+            if dropped:
+                log(f"⚠️ {table_name}: index {', '.join(dropped)} skipped.")
+                schema.indexes = [index for index in schema.indexes if name not in index.columns]
+
+    return schema
+
+
+def _to_text(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    return str(value)
+
+
+def _to_integer(value):
+    if value is None or isinstance(value, int):
+        return value
+    number = float(value)
+    if not number.is_integer():
+        raise ValueError(f"{value!r} is not an integer")
+    return int(number)
+
+
+def _to_float(value):
+    return None if value is None else float(value)
+
+
+def _to_datetime(value):
+    if value is None:
+        return None
+    parsed = datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _to_date(value):
+    return None if value is None else date.fromisoformat(value)
+
+
+def _to_bytes(value):
+    if value is None or isinstance(value, bytes):
+        return value
+    return value.encode('utf-8') if isinstance(value, str) else str(value).encode('utf-8')
+
+
+def value_converter(sql_type: str) -> Callable[[Any], Any]:
+    """Return the function that turns a SQLite value into a parameter for sql_type (NULL stays None)"""
+    if sql_type in ("INT", "BIGINT", "BIT"):
+        return _to_integer
+    if sql_type == "FLOAT":
+        return _to_float
+    if sql_type == "DATETIME2":
+        return _to_datetime
+    if sql_type == "DATE":
+        return _to_date
+    if sql_type == "VARBINARY(MAX)":
+        return _to_bytes
+    return _to_text
+
+
+def convert_rows(rows: List[tuple], converters: List[Callable[[Any], Any]]) -> List[tuple]:
+    """Convert each value of each row with the converter of its column"""
+    return [tuple(convert(value) for convert, value in zip(converters, row)) for row in rows]
+
+
+_READER_DONE = object()
+
+
+def read_batches_parallel(db_file: str, table_name: str, options: MigrationOptions,
+                          with_rowid: bool = False, after: Optional[int] = None) -> Tuple[List[str], Iterator[List[tuple]]]:
+    """
+    Stream a table in batches read over rowid ranges by several connections
+
+    The table is cut into rowid ranges of read_range_rows rows, with the
+    boundaries taken from the rowids that exist so sparse rowids give no
+    empty ranges. read_workers
+    threads, each with its own read-only connection, take ranges in turn
+    and put their fetchmany batches on a bounded queue, so readers wait
+    once the writer falls behind instead of filling memory. SQLite
+    releases the GIL while it steps through a range, so the readers use
+    several cores. Batches arrive in no particular order.
+
+    Args:
+        db_file: SQLite database path
+        table_name: Table to read
+        options: batch_size, read_workers, read_range_rows and reader settings
+        with_rowid: Append each row's rowid as an extra last field
+        after: Only read rows with a rowid above this
+
+    Returns:
+        Tuple of (column names without the rowid, iterator of row batches)
+    """
+    ranges = queue.SimpleQueue()
+    conn_sqlite = open_sqlite_reader(db_file, options)
+    try:
+        source = quote_sqlite(table_name)
+        columns = [description[0] for description in conn_sqlite.execute(f"SELECT * FROM {source} LIMIT 0").description]
+        # Step through the rowids that exist; the last range is open-ended
+        low = None if after is None else after + 1
+        range_rows = max(1, options.read_range_rows)
+        while True:
+            condition, parameters = key_range_filter('rowid', low, None)
+            row = conn_sqlite.execute(f"SELECT rowid FROM {source}{condition} ORDER BY rowid LIMIT 1 OFFSET ?",
+                                      parameters + [range_rows]).fetchone()
+            ranges.put((low, None if row is None else row[0]))
+            if row is None:
+                break
+            low = row[0]
+    finally:
+        conn_sqlite.close()
+
+    query = f"SELECT *{', rowid' if with_rowid else ''} FROM {source}"
+    workers = max(1, options.read_workers)
+    batches_queue = queue.Queue(maxsize=2 * workers)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                batches_queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def reader():
+        try:
+            conn = open_sqlite_reader(db_file, options)
+            try:
+                while not stop.is_set():
+                    try:
+                        range_low, range_high = ranges.get_nowait()
+                    except queue.Empty:
+                        break
+                    condition, parameters = key_range_filter('rowid', range_low, range_high)
+                    cursor = conn.execute(query + condition, parameters)
+                    while not stop.is_set():
+                        rows = cursor.fetchmany(options.batch_size)
+                        if not rows:
+                            break
+                        put(rows)
+                    cursor.close()
+            finally:
+                conn.close()
+        except Exception as e:
+            put(e)
+        finally:
+            put(_READER_DONE)
+
+    def batches():
+        threads = [threading.Thread(target=reader, name=f"sqlite-reader-{number}", daemon=True)
+                   for number in range(workers)]
+        for thread in threads:
+            thread.start()
+        finished = 0
+        try:
+            while finished < len(threads):
+                item = batches_queue.get()
+                if item is _READER_DONE:
+                    finished += 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    return columns, batches()
+
+
+def rows_as_strings(rows: List[tuple]) -> List[tuple]:
+    """Convert every value to str as the scripts' astype(str) did, but keep NULLs"""
+    return [tuple(_to_text(value) for value in row) for row in rows]
+
+
+def create_target_table(cursor_sql, target_table: str, columns: List[str], schema: Optional[TableSchema] = None):
+    """
+    Create the SQL Server table unless it already exists
+
+    Without a schema every column is NVARCHAR(MAX); with one, the mapped
+    types, NULL constraints and primary key are used.
+    """
+    if schema is None:
+        column_definitions = ', '.join(f"{quote_sql_server(column)} NVARCHAR(MAX)" for column in columns)
+    else:
+        definitions = [f"{quote_sql_server(column.name)} {column.sql_type} {'NULL' if column.nullable else 'NOT NULL'}"
+                       for column in schema.columns]
+        if schema.primary_key:
+            key_columns = ', '.join(quote_sql_server(name) for name in schema.primary_key)
+            definitions.append(f"CONSTRAINT {quote_sql_server(('PK_' + target_table)[:128])} "
+                               f"PRIMARY KEY ({key_columns})")
+        column_definitions = ', '.join(definitions)
+
+    cursor_sql.execute(f"""
+        IF NOT EXISTS (
+            SELECT * FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_NAME = ?
+        )
+        BEGIN
+            CREATE TABLE {quote_sql_server(target_table)} ({column_definitions})
+        END
+    """, target_table)
+
+
+def create_target_indexes(cursor_sql, target_table: str, schema: TableSchema,
+                          log: Callable[[str], None] = print) -> int:
+    """
+    Create the SQLite indexes on the loaded SQL Server table
+
+    Indexes are built after the load, which is much faster than keeping
+    them up to date row by row. SQL Server lets a unique index hold only
+    one NULL, so unique indexes over nullable columns are filtered to
+    non-NULL keys, matching SQLite.
+
+    Returns:
+        Number of indexes that exist afterwards
+    """
+    nullable = {column.name for column in schema.columns if column.nullable}
+    created = 0
+    for index in schema.indexes:
+        index_name = f"IX_{target_table}_{index.name}"[:128]
+        key_columns = ', '.join(quote_sql_server(name) for name in index.columns)
+        where = ''
+        if index.unique and nullable.intersection(index.columns):
+            where = ' WHERE ' + ' AND '.join(f"{quote_sql_server(name)} IS NOT NULL"
+                                             for name in index.columns if name in nullable)
+        try:
+            cursor_sql.execute(f"""
+                IF NOT EXISTS (
+                    SELECT * FROM sys.indexes
+                    WHERE name = ? AND object_id = OBJECT_ID(?)
+                )
+                BEGIN
+                    CREATE {'UNIQUE ' if index.unique else ''}INDEX {quote_sql_server(index_name)}
+                    ON {quote_sql_server(target_table)} ({key_columns}){where}
+                END
+            """, index_name, quote_sql_server(target_table))
+            created += 1
+        except Exception as e:
+            log(f"⚠️ Could not create index {index_name}: {e}")
+    return created
+
+
+# Control table holding the high-water mark of every incrementally migrated table
+WATERMARK_TABLE = 'migration_watermarks'
+
+
+def encode_watermark(value: Any) -> Tuple[str, str]:
+    """Return (text, type) for storing a watermark value in the control table"""
+    if isinstance(value, int):
+        return str(value), 'integer'
+    if isinstance(value, float):
+        return repr(value), 'real'
+    return str(value), 'text'
+
+
+def decode_watermark(text: Optional[str], value_type: Optional[str]) -> Any:
+    """Turn a stored watermark back into the value compared against the SQLite column"""
+    if text is None:
+        return None
+    if value_type == 'integer':
+        return int(text)
+    if value_type == 'real':
+        return float(text)
+    return text
+
+
+def parse_connection_string(connection_string: str) -> Dict[str, str]:
+    """Split an ODBC connection string into upper-case keys and values"""
+    settings = {}
+    for part in connection_string.split(';'):
+        if '=' in part:
+            key, value = part.split('=', 1)
+            settings[key.strip().upper()] = value.strip().strip('{}')
+    return settings
+
+
+class TargetWriter:
+    """
+    Loads migrated tables into one target connection
+
+    A writer is used by one table at a time: create_table, optionally
+    start_upsert, write_batch and commit for every batch, finish_table,
+    then create_indexes. Each parallel task opens its own writer.
+
+    Writers that only load data in finish_table set loads_on_finish, so
+    watermarks are saved after the load instead of after every batch.
+    Writers whose target only one process can open at a time clear
+    multi_process, so parallel runs use threads for them.
+    """
+
+    name = ''
+    loads_on_finish = False
+    multi_process = True
+
+    def target_has_rows(self, target_table: str) -> bool:
+        raise NotImplementedError
+
+    def create_table(self, target_table: str, columns: List[str], schema: Optional[TableSchema]):
+        raise NotImplementedError
+
+    def start_upsert(self, target_table: str, columns: List[str], key_columns: List[str]):
+        """Make the following batches update rows whose key already exists instead of adding them"""
+        raise NotImplementedError(f"The {self.name} writer cannot upsert")
+
+    def write_batch(self, target_table: str, columns: List[str], rows: List[tuple]):
+        raise NotImplementedError
+
+    def read_watermark(self, target_table: str) -> Optional[Tuple[str, Any]]:
+        """Return (column, highest migrated value) for a table, or None before its first incremental run"""
+        raise NotImplementedError
+
+    def save_watermark(self, target_table: str, source_db: str, table_name: str, column: str,
+                       value: Any, rows: int):
+        """Record the highest migrated value; takes effect with the next commit"""
+        raise NotImplementedError
+
+    def read_rows(self, target_table: str, columns: List[str], key_column: Optional[str] = None,
+                  low: Any = None, high: Any = None, batch_size: int = 10000) -> Iterator[List[tuple]]:
+        """Stream target rows, optionally only those with low <= key_column < high (a None bound is open)"""
+        raise NotImplementedError
+
+    def delete_rows(self, target_table: str, key_column: Optional[str] = None, low: Any = None, high: Any = None):
+        """Delete target rows with low <= key_column < high (a None bound is open); takes effect on commit"""
+        raise NotImplementedError
+
+    def count_rows(self, target_table: str) -> int:
+        """Return the number of rows in a target table"""
+        raise NotImplementedError
+
+    def commit(self):
+        pass
+
+    def finish_table(self, target_table: str, columns: List[str], log: Callable[[str], None] = print):
+        """Complete the load of a table after its last batch"""
+
+    def create_indexes(self, target_table: str, schema: TableSchema, log: Callable[[str], None] = print) -> int:
+        return 0
+
+    def close(self):
+        pass
+
+
+class ExecutemanyWriter(TargetWriter):
+    """Parameterized INSERT per row, sent in batches with pyodbc fast_executemany"""
+
+    name = 'executemany'
+
+    def __init__(self, connection_string: str, options: MigrationOptions):
+        if pyodbc is None:
+            raise RuntimeError("pyodbc is not installed (pip install pyodbc)")
+        self.connection_string = connection_string
+        self.options = options
+        self.conn = pyodbc.connect(connection_string)
+        self.cursor = self.conn.cursor()
+        self.cursor.fast_executemany = True
+        self._upserts = {}  # target_table -> (staging table, MERGE statement)
+
+    def target_has_rows(self, target_table: str) -> bool:
+        if self.cursor.execute("SELECT OBJECT_ID(?, N'U')", quote_sql_server(target_table)).fetchone()[0] is None:
+            return False
+        return self.cursor.execute(f"SELECT TOP 1 1 FROM {quote_sql_server(target_table)}").fetchone() is not None
+
+    def create_table(self, target_table: str, columns: List[str], schema: Optional[TableSchema]):
+        create_target_table(self.cursor, target_table, columns, schema)
+        self.conn.commit()
+
+    def start_upsert(self, target_table: str, columns: List[str], key_columns: List[str]):
+        # Batches go to an empty copy of the table and are merged from there
+        staging_table = f"{target_table}__staging"
+        self.cursor.execute(f"IF OBJECT_ID(?, N'U') IS NOT NULL DROP TABLE {quote_sql_server(staging_table)}",
+                            quote_sql_server(staging_table))
+        self.cursor.execute(f"SELECT TOP 0 * INTO {quote_sql_server(staging_table)} "
+                            f"FROM {quote_sql_server(target_table)}")
+        self.conn.commit()
+
+        match = ' AND '.join(f"target.{quote_sql_server(name)} = source.{quote_sql_server(name)}"
+                             for name in key_columns)
+        updates = ', '.join(f"target.{quote_sql_server(name)} = source.{quote_sql_server(name)}"
+                            for name in columns if name not in key_columns)
+        column_list = ', '.join(quote_sql_server(name) for name in columns)
+        source_list = ', '.join(f"source.{quote_sql_server(name)}" for name in columns)
+        merge = (f"MERGE {quote_sql_server(target_table)} WITH (HOLDLOCK) AS target "
+                 f"USING {quote_sql_server(staging_table)} AS source ON {match} "
+                 + (f"WHEN MATCHED THEN UPDATE SET {updates} " if updates else '')
+                 + f"WHEN NOT MATCHED BY TARGET THEN INSERT ({column_list}) VALUES ({source_list});")
+        self._upserts[target_table] = (staging_table, merge)
+
+    def insert_query(self, target_table: str, columns: List[str], rows: int = 1) -> str:
+        row_placeholders = '(' + ', '.join('?' for _ in columns) + ')'
+        column_list = ', '.join(quote_sql_server(column) for column in columns)
+        return (f"INSERT INTO {quote_sql_server(target_table)} ({column_list}) VALUES "
+                + ', '.join(row_placeholders for _ in range(rows)))
+
+    def insert_rows(self, table: str, columns: List[str], rows: List[tuple]):
+        self.cursor.executemany(self.insert_query(table, columns), rows)
+
+    def write_batch(self, target_table: str, columns: List[str], rows: List[tuple]):
+        upsert = self._upserts.get(target_table)
+        if upsert is None:
+            self.insert_rows(target_table, columns, rows)
+            return
+        staging_table, merge = upsert
+        self.insert_rows(staging_table, columns, rows)
+        self.cursor.execute(merge)
+        self.cursor.execute(f"TRUNCATE TABLE {quote_sql_server(staging_table)}")
+
+    def finish_table(self, target_table: str, columns: List[str], log: Callable[[str], None] = print):
+        upsert = self._upserts.pop(target_table, None)
+        if upsert is not None:
+            self.cursor.execute(f"DROP TABLE {quote_sql_server(upsert[0])}")
+            self.conn.commit()
+
+    def _ensure_watermark_table(self):
+        self.cursor.execute(f"""
+            IF OBJECT_ID(N'{WATERMARK_TABLE}', N'U') IS NULL
+            CREATE TABLE {WATERMARK_TABLE} (
+                target_table NVARCHAR(256) NOT NULL PRIMARY KEY,
+                source_db NVARCHAR(256) NULL,
+                table_name NVARCHAR(256) NULL,
+                watermark_column NVARCHAR(256) NOT NULL,
+                watermark_value NVARCHAR(400) NULL,
+                watermark_type NVARCHAR(10) NULL,
+                rows_migrated BIGINT NOT NULL DEFAULT 0,
+                updated_at DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME()
+            )
+        """)
+        self.conn.commit()
+
+    def read_watermark(self, target_table: str) -> Optional[Tuple[str, Any]]:
+        self._ensure_watermark_table()
+        row = self.cursor.execute(
+            f"SELECT watermark_column, watermark_value, watermark_type FROM {WATERMARK_TABLE} WHERE target_table = ?",
+            target_table).fetchone()
+        return (row[0], decode_watermark(row[1], row[2])) if row else None
+
+    def save_watermark(self, target_table: str, source_db: str, table_name: str, column: str,
+                       value: Any, rows: int):
+        text, value_type = encode_watermark(value)
+        self.cursor.execute(f"""
+            UPDATE {WATERMARK_TABLE}
+            SET watermark_column = ?, watermark_value = ?, watermark_type = ?,
+                rows_migrated = rows_migrated + ?, updated_at = SYSUTCDATETIME()
+            WHERE target_table = ?;
+            IF @@ROWCOUNT = 0
+                INSERT INTO {WATERMARK_TABLE}
+                    (target_table, source_db, table_name, watermark_column, watermark_value, watermark_type, rows_migrated)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, column, text, value_type, rows, target_table,
+            target_table, source_db, table_name, column, text, value_type, rows)
+
+    def read_rows(self, target_table: str, columns: List[str], key_column: Optional[str] = None,
+                  low: Any = None, high: Any = None, batch_size: int = 10000) -> Iterator[List[tuple]]:
+        query = (f"SELECT {', '.join(quote_sql_server(column) for column in columns)} "
+                 f"FROM {quote_sql_server(target_table)}")
+        parameters = []
+        if key_column:
+            condition, parameters = key_range_filter(quote_sql_server(key_column), low, high)
+            query += condition
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(query, *parameters)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+    def delete_rows(self, target_table: str, key_column: Optional[str] = None, low: Any = None, high: Any = None):
+        condition, parameters = key_range_filter(quote_sql_server(key_column), low, high) if key_column else ("", [])
+        self.cursor.execute(f"DELETE FROM {quote_sql_server(target_table)}{condition}", *parameters)
+
+    def count_rows(self, target_table: str) -> int:
+        return self.cursor.execute(f"SELECT COUNT_BIG(*) FROM {quote_sql_server(target_table)}").fetchone()[0]
+
+    def commit(self):
+        self.conn.commit()
+
+    def create_indexes(self, target_table: str, schema: TableSchema, log: Callable[[str], None] = print) -> int:
+        created = create_target_indexes(self.cursor, target_table, schema, log)
+        self.conn.commit()
+        return created
+
+    def close(self):
+        self.cursor.close()
+        self.conn.close()
+
+
+class MultiRowValuesWriter(ExecutemanyWriter):
+    """
+    INSERT ... VALUES (...), (...), ... with many rows per statement
+
+    SQL Server accepts at most 1000 rows per VALUES list and 2100
+    parameters per statement, so the rows per statement shrink for wide
+    tables.
+    """
+
+    name = 'multirow'
+
+    MAX_ROWS = 1000
+    MAX_PARAMETERS = 2099
+
+    def insert_rows(self, table: str, columns: List[str], rows: List[tuple]):
+        per_statement = max(1, min(self.MAX_ROWS, self.MAX_PARAMETERS // max(1, len(columns))))
+        full_query = None
+        for start in range(0, len(rows), per_statement):
+            chunk = rows[start:start + per_statement]
+            if len(chunk) == per_statement:
+                full_query = full_query or self.insert_query(table, columns, per_statement)
+                query = full_query
+            else:
+                query = self.insert_query(table, columns, len(chunk))
+            self.cursor.execute(query, [value for row in chunk for value in row])
+
+
+# bcp format file column types for the mapped SQL Server types
+BCP_COLUMN_TYPES = {
+    "INT": "SQLINT",
+    "BIGINT": "SQLBIGINT",
+    "BIT": "SQLBIT",
+    "FLOAT": "SQLFLT8",
+    "DATE": "SQLDATE",
+    "DATETIME2": "SQLDATETIME2",
+    "VARBINARY(MAX)": "SQLVARYBIN"
+}
+
+BCP_NULL_PREFIX = b'\xff\xff\xff\xff'
+
+
+class BcpWriter(ExecutemanyWriter):
+    """
+    Bulk load through the bcp utility from length-prefixed staging files
+
+    Batches are appended to a staging file in which every field carries a
+    4-byte length prefix (-1 for NULL), described by a generated XML
+    format file, so no value needs escaping and NULLs and empty strings
+    stay distinct. The whole file is loaded with one bcp call per table
+    (TABLOCK, committed every batch_size rows). Tables and indexes are
+    still created over the pyodbc connection; upserts load the file into
+    the staging table and merge it from there.
+    """
+
+    name = 'bcp'
+    loads_on_finish = True
+
+    def __init__(self, connection_string: str, options: MigrationOptions):
+        super().__init__(connection_string, options)
+        self.settings = parse_connection_string(connection_string)
+        self.staging_dir = options.staging_dir or tempfile.gettempdir()
+        os.makedirs(self.staging_dir, exist_ok=True)
+        self._staging = {}  # target_table -> (data file, format file, open file, column types)
+
+    def create_table(self, target_table: str, columns: List[str], schema: Optional[TableSchema]):
+        super().create_table(target_table, columns, schema)
+        sql_types = [column.sql_type for column in schema.columns] if schema else ["NVARCHAR(MAX)"] * len(columns)
+        base = os.path.join(self.staging_dir, f"{target_table}.{os.getpid()}.{threading.get_ident()}")
+        data_file, format_file = base + '.dat', base + '.xml'
+        with open(format_file, 'w', encoding='utf-8') as f:
+            f.write(self.format_file_xml(columns, sql_types))
+        self._staging[target_table] = (data_file, format_file, open(data_file, 'wb'), sql_types)
+
+    @staticmethod
+    def format_file_xml(columns: List[str], sql_types: List[str]) -> str:
+        """Return the bcp XML format file describing the staging file layout"""
+        fields, row_columns = [], []
+        for number, (column, sql_type) in enumerate(zip(columns, sql_types), start=1):
+            field_type = 'NativePrefix' if sql_type == "VARBINARY(MAX)" else 'NCharPrefix'
+            fields.append(f'  <FIELD ID="{number}" xsi:type="{field_type}" PREFIX_LENGTH="4"/>')
+            row_columns.append(f'  <COLUMN SOURCE="{number}" NAME="{xml_escape(column, {chr(34): "&quot;"})}" '
+                               f'xsi:type="{BCP_COLUMN_TYPES.get(sql_type, "SQLNVARCHAR")}"/>')
+        return ('<?xml version="1.0"?>\n'
+                '<BCPFORMAT xmlns="http://schemas.microsoft.com/sqlserver/2004/bulkload/format" '
+                'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">\n'
+                ' <RECORD>\n' + '\n'.join(fields) + '\n </RECORD>\n'
+                ' <ROW>\n' + '\n'.join(row_columns) + '\n </ROW>\n'
+                '</BCPFORMAT>\n')
+
+    @staticmethod
+    def encode_field(value, sql_type: str) -> bytes:
+        """Encode one value as a length-prefixed staging field"""
+        if value is None:
+            return BCP_NULL_PREFIX
+        if sql_type == "VARBINARY(MAX)":
+            data = value
+        else:
+            if isinstance(value, datetime):
+                text = value.isoformat(sep=' ')
+            elif isinstance(value, float):
+                text = repr(value)
+            elif isinstance(value, bool):
+                text = '1' if value else '0'
+            else:
+                text = str(value)
+            data = text.encode('utf-16-le')
+        return struct.pack('<I', len(data)) + data
+
+    def write_batch(self, target_table: str, columns: List[str], rows: List[tuple]):
+        _, _, staging_file, sql_types = self._staging[target_table]
+        encode = self.encode_field
+        staging_file.write(b''.join(encode(value, sql_type)
+                                    for row in rows for value, sql_type in zip(row, sql_types)))
+
+    def bcp_command(self, target_table: str, data_file: str, format_file: str) -> List[str]:
+        """Return the bcp command line that loads a staging file"""
+        command = [self.options.bcp_path, f"dbo.{quote_sql_server(target_table)}", 'in', data_file,
+                   '-f', format_file, '-S', self.settings.get('SERVER', ''), '-d', self.settings.get('DATABASE', ''),
+                   '-b', str(self.options.batch_size), '-h', 'TABLOCK', '-m', '1']
+        if self.settings.get('UID'):
+            command += ['-U', self.settings['UID'], '-P', self.settings.get('PWD', '')]
+        else:
+            command.append('-T')
+        return command
+
+    def finish_table(self, target_table: str, columns: List[str], log: Callable[[str], None] = print):
+        data_file, format_file, staging_file, _ = self._staging.pop(target_table)
+        staging_file.close()
+        upsert = self._upserts.get(target_table)
+        load_table = upsert[0] if upsert else target_table
+        completed = subprocess.run(self.bcp_command(load_table, data_file, format_file),
+                                   capture_output=True, text=True)
+        if completed.returncode != 0:
+            output = (completed.stdout + completed.stderr).strip()
+            raise RuntimeError(f"bcp failed ({completed.returncode}), staging file kept at {data_file}: {output}")
+        copied = re.search(r"(\d+) rows copied", completed.stdout)
+        log(f"📥 bcp loaded {copied.group(1) if copied else '?'} rows into {load_table}")
+        os.remove(data_file)
+        os.remove(format_file)
+
+        if upsert:
+            self.cursor.execute(upsert[1])
+            self.conn.commit()
+        super().finish_table(target_table, columns, log)
+
+    def close(self):
+        for _, _, staging_file, _ in self._staging.values():
+            staging_file.close()
+        self._staging.clear()
+        super().close()
+
+
+class LocalTargetWriter(TargetWriter):
+    """
+    Local database target for testing and benchmarking without SQL Server
+
+    The mapped SQL Server types are translated to the local engine's
+    types; keys, indexes and values are carried over the same way.
+    """
+
+    TYPE_NAMES: Dict[str, str] = {}
+    TEXT_TYPE = 'TEXT'
+
+    def __init__(self, connection_string: str, options: MigrationOptions):
+        self.path = connection_string
+        self.options = options
+        self.conn = None
+        self._upserts = {}  # target_table -> ON CONFLICT clause
+
+    def local_type(self, sql_type: str) -> str:
+        return self.TYPE_NAMES.get(sql_type, self.TEXT_TYPE)
+
+    def target_has_rows(self, target_table: str) -> bool:
+        try:
+            return self.conn.execute(f"SELECT 1 FROM {quote_sqlite(target_table)} LIMIT 1").fetchone() is not None
+        except Exception:
+            return False
+
+    def create_table(self, target_table: str, columns: List[str], schema: Optional[TableSchema]):
+        if schema is None:
+            definitions = [f"{quote_sqlite(column)} {self.TEXT_TYPE}" for column in columns]
+        else:
+            definitions = [f"{quote_sqlite(column.name)} {self.local_type(column.sql_type)}"
+                           f"{'' if column.nullable else ' NOT NULL'}" for column in schema.columns]
+            if schema.primary_key:
+                definitions.append(f"PRIMARY KEY ({', '.join(quote_sqlite(name) for name in schema.primary_key)})")
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {quote_sqlite(target_table)} ({', '.join(definitions)})")
+        self.conn.commit()
+
+    def adapt_rows(self, rows: List[tuple]) -> List[tuple]:
+        return rows
+
+    def insert_query(self, target_table: str, columns: List[str]) -> str:
+        placeholders = ', '.join('?' for _ in columns)
+        column_list = ', '.join(quote_sqlite(column) for column in columns)
+        return f"INSERT INTO {quote_sqlite(target_table)} ({column_list}) VALUES ({placeholders})"
+
+    def start_upsert(self, target_table: str, columns: List[str], key_columns: List[str]):
+        updates = ', '.join(f"{quote_sqlite(name)} = excluded.{quote_sqlite(name)}"
+                            for name in columns if name not in key_columns)
+        self._upserts[target_table] = (
+            f" ON CONFLICT ({', '.join(quote_sqlite(name) for name in key_columns)}) "
+            + (f"DO UPDATE SET {updates}" if updates else "DO NOTHING"))
+
+    def write_batch(self, target_table: str, columns: List[str], rows: List[tuple]):
+        query = self.insert_query(target_table, columns) + self._upserts.get(target_table, '')
+        self.conn.executemany(query, self.adapt_rows(rows))
+
+    def finish_table(self, target_table: str, columns: List[str], log: Callable[[str], None] = print):
+        self._upserts.pop(target_table, None)
+
+    def read_watermark(self, target_table: str) -> Optional[Tuple[str, Any]]:
+        self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+                target_table VARCHAR PRIMARY KEY,
+                source_db VARCHAR,
+                table_name VARCHAR,
+                watermark_column VARCHAR NOT NULL,
+                watermark_value VARCHAR,
+                watermark_type VARCHAR,
+                rows_migrated BIGINT NOT NULL DEFAULT 0,
+                updated_at VARCHAR
+            )
+        """)
+        self.conn.commit()
+        row = self.conn.execute(
+            f"SELECT watermark_column, watermark_value, watermark_type FROM {WATERMARK_TABLE} WHERE target_table = ?",
+            (target_table,)).fetchone()
+        return (row[0], decode_watermark(row[1], row[2])) if row else None
+
+    def save_watermark(self, target_table: str, source_db: str, table_name: str, column: str,
+                       value: Any, rows: int):
+        text, value_type = encode_watermark(value)
+        self.conn.execute(f"""
+            INSERT INTO {WATERMARK_TABLE}
+                (target_table, source_db, table_name, watermark_column, watermark_value, watermark_type,
+                 rows_migrated, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (target_table) DO UPDATE SET
+                watermark_column = excluded.watermark_column,
+                watermark_value = excluded.watermark_value,
+                watermark_type = excluded.watermark_type,
+                rows_migrated = {WATERMARK_TABLE}.rows_migrated + excluded.rows_migrated,
+                updated_at = excluded.updated_at
+        """, (target_table, source_db, table_name, column, text, value_type, rows,
+              datetime.now(timezone.utc).isoformat(sep=' ', timespec='seconds')))
+
+    def read_rows(self, target_table: str, columns: List[str], key_column: Optional[str] = None,
+                  low: Any = None, high: Any = None, batch_size: int = 10000) -> Iterator[List[tuple]]:
+        query = f"SELECT {', '.join(quote_sqlite(column) for column in columns)} FROM {quote_sqlite(target_table)}"
+        parameters = []
+        if key_column:
+            condition, parameters = key_range_filter(quote_sqlite(key_column), low, high)
+            query += condition
+        cursor = self.conn.cursor()
+        cursor.execute(query, parameters)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+    def delete_rows(self, target_table: str, key_column: Optional[str] = None, low: Any = None, high: Any = None):
+        condition, parameters = key_range_filter(quote_sqlite(key_column), low, high) if key_column else ("", [])
+        self.conn.execute(f"DELETE FROM {quote_sqlite(target_table)}{condition}", parameters)
+
+    def count_rows(self, target_table: str) -> int:
+        return self.conn.execute(f"SELECT COUNT(*) FROM {quote_sqlite(target_table)}").fetchone()[0]
+
+    def commit(self):
+        self.conn.commit()
+
+    def create_indexes(self, target_table: str, schema: TableSchema, log: Callable[[str], None] = print) -> int:
+        created = 0
+        for index in schema.indexes:
+            index_name = f"IX_{target_table}_{index.name}"
+            try:
+                self.conn.execute(
+                    f"CREATE {'UNIQUE ' if index.unique else ''}INDEX IF NOT EXISTS {quote_sqlite(index_name)} "
+                    f"ON {quote_sqlite(target_table)} ({', '.join(quote_sqlite(name) for name in index.columns)})")
+                created += 1
+            except Exception as e:
+                log(f"⚠️ Could not create index {index_name}: {e}")
+        self.conn.commit()
+        return created
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+class SqliteTargetWriter(LocalTargetWriter):
+    """SQLite database file as the migration target"""
+
+    name = 'sqlite'
+
+    TYPE_NAMES = {
+        "INT": "INTEGER", "BIGINT": "INTEGER", "BIT": "INTEGER", "FLOAT": "REAL",
+        "VARBINARY(MAX)": "BLOB"
+    }
+
+    def __init__(self, connection_string: str, options: MigrationOptions):
+        super().__init__(connection_string, options)
+        # Parallel tasks share the file, so wait for the write lock instead of failing
+        self.conn = sqlite3.connect(self.path, timeout=300, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
+    def adapt_rows(self, rows: List[tuple]) -> List[tuple]:
+        # Dates are stored as ISO text, as SQLite itself does
+        return [tuple(value.isoformat(sep=' ') if isinstance(value, datetime)
+                      else value.isoformat() if isinstance(value, date) else value
+                      for value in row) for row in rows]
+
+
+class DuckDbTargetWriter(LocalTargetWriter):
+    """DuckDB database file as the migration target (pip install duckdb)"""
+
+    name = 'duckdb'
+    multi_process = False  # DuckDB locks the database file to one process
+
+    TYPE_NAMES = {
+        "INT": "INTEGER", "BIGINT": "BIGINT", "BIT": "BOOLEAN", "FLOAT": "DOUBLE",
+        "DATE": "DATE", "DATETIME2": "TIMESTAMP", "VARBINARY(MAX)": "BLOB"
+    }
+    TEXT_TYPE = 'VARCHAR'
+
+    def __init__(self, connection_string: str, options: MigrationOptions):
+        super().__init__(connection_string, options)
+        if duckdb is None:
+            raise RuntimeError("duckdb is not installed (pip install duckdb)")
+        self.conn = duckdb.connect(self.path)
+
+    def write_batch(self, target_table: str, columns: List[str], rows: List[tuple]):
+        if pd is None:
+            super().write_batch(target_table, columns, rows)
+            return
+        # Object columns keep None as NULL instead of turning integer columns into floats
+        frame = pd.DataFrame({f"c{number}": pd.Series(values, dtype=object)
+                              for number, values in enumerate(zip(*rows))})
+        self.conn.register('batch_rows', frame)
+        try:
+            self.conn.execute(f"INSERT INTO {quote_sqlite(target_table)} "
+                              f"({', '.join(quote_sqlite(column) for column in columns)}) SELECT * FROM batch_rows"
+                              + self._upserts.get(target_table, ''))
+        finally:
+            self.conn.unregister('batch_rows')
+
+
+TARGET_WRITERS = {
+    writer.name: writer
+    for writer in (ExecutemanyWriter, MultiRowValuesWriter, BcpWriter, SqliteTargetWriter, DuckDbTargetWriter)
+}
+
+
+def open_target_writer(connection_string: str, options: MigrationOptions) -> TargetWriter:
+    """
+    Open the target writer selected in the options
+
+    Args:
+        connection_string: pyodbc connection string, or the database file
+                           for the sqlite and duckdb writers
+        options: Run settings; options.writer names the strategy
+
+    Returns:
+        Open TargetWriter
+    """
+    writer_class = TARGET_WRITERS.get(options.writer)
+    if writer_class is None:
+        raise ValueError(f"Unknown writer '{options.writer}' (choose from {', '.join(TARGET_WRITERS)})")
+    return writer_class(connection_string, options)
+
+
+def _record_phase(result: TableResult, phase: str, since: float) -> float:
+    # Add the time since the last mark to a phase and return the new mark
+    now = time.perf_counter()
+    result.phase_seconds[phase] = result.phase_seconds.get(phase, 0.0) + now - since
+    return now
+
+
+def migrate_table(conn_sqlite: sqlite3.Connection, writer: TargetWriter, db_name: str, table_name: str,
+                  options: Optional[MigrationOptions] = None, log: Callable[[str], None] = print) -> TableResult:
+    """
+    Copy one SQLite table to the target batch by batch
+
+    Each fetchmany batch is converted and written with executemany before
+    the next one is read, so at most one batch is held in memory however
+    large the table is. With preserve_types the target gets sized column
+    types, the primary key and the indexes of the SQLite table; otherwise
+    every column is NVARCHAR(MAX) text. NULLs stay NULL either way.
+
+    A target table that already holds rows is skipped and reported as an
+    error, so a rerun does not duplicate it. In incremental mode only rows
+    above the table's stored high-water mark (rowid or the column set in
+    watermark_columns) are read, and the mark is saved with every committed
+    batch. With upsert on a table with a primary key, rows whose key already
+    exists are updated instead; combine it with a last-modified watermark
+    column to pick up changed rows.
+
+    Tables of at least parallel_read_min_rows rows are read over rowid
+    ranges by read_workers connections (see read_batches_parallel). In
+    incremental mode that needs upsert, because the mark can only be saved
+    once every range is loaded and an interrupted run reads some rows again.
+
+    Args:
+        conn_sqlite: Open SQLite connection
+        writer: Open target writer
+        db_name: Prefix for the target table name
+        table_name: SQLite table to copy
+        options: Batch size, type mapping and incremental settings
+        log: Progress output
+
+    Returns:
+        TableResult for the table
+    """
+    options = options or MigrationOptions()
+    target_table = f"{db_name}_{table_name}"
+    result = TableResult(db_name, table_name, target_table)
+    started = time.perf_counter()
+    log(f"🔄 Migrating table: {table_name} → {target_table}")
+
+    watermark_column = options.watermark_columns.get(table_name, 'rowid') if options.incremental else None
+    after = None
+    try:
+        if options.incremental:
+            stored = writer.read_watermark(target_table)
+            if stored is not None:
+                if stored[0] != watermark_column:
+                    result.error = (f"Watermark column changed from {stored[0]} to {watermark_column}; "
+                                    f"delete its row in {WATERMARK_TABLE} to start over")
+                    log(f"❌ {result.error}")
+                    return result
+                after = stored[1]
+                log(f"⏩ {target_table}: continuing after {watermark_column} = {after}")
+    except Exception as e:
+        result.error = f"Failed to read the target state of {target_table}: {e}"
+        log(f"❌ {result.error}")
+        return result
+
+    try:
+        mark = time.perf_counter()
+        schema = map_table_schema(conn_sqlite, table_name, options.sample_rows, log) \
+            if options.preserve_types else None
+        mark = _record_phase(result, 'schema', mark)
+    except Exception as e:
+        result.error = f"Failed to read table {table_name}: {e}"
+        log(f"❌ {result.error}")
+        return result
+
+    # Without a primary key there is nothing to upsert on, so existing rows would be duplicated
+    can_upsert = options.upsert and schema is not None and bool(schema.primary_key)
+    try:
+        if after is None and not can_upsert and writer.target_has_rows(target_table):
+            hint = ('enable upsert on a table with a primary key to merge into it' if options.incremental
+                    else 'use incremental mode for new rows')
+            result.error = f"Table {target_table} already holds rows—skipped ({hint})"
+            log(f"⚠️ {result.error}.")
+            return result
+    except Exception as e:
+        result.error = f"Failed to read the target state of {target_table}: {e}"
+        log(f"❌ {result.error}")
+        return result
+
+    try:
+        parallel_read = (options.read_workers > 1
+                         and watermark_column in (None, 'rowid') and (not watermark_column or can_upsert)
+                         and estimate_rows(conn_sqlite, table_name) >= options.parallel_read_min_rows
+                         and has_rowid(conn_sqlite, table_name))
+        if parallel_read:
+            db_file = conn_sqlite.execute("PRAGMA database_list").fetchone()[2]
+            log(f"🧵 Reading {table_name} with {options.read_workers} connections over rowid ranges")
+            columns, batches = read_batches_parallel(db_file, table_name, options, bool(watermark_column), after)
+        else:
+            columns, batches = read_batches(conn_sqlite, table_name, options.batch_size, watermark_column, after)
+        first_batch = next(batches, None)
+        _record_phase(result, 'read', mark)
+    except Exception as e:
+        result.error = f"Failed to read table {table_name}: {e}"
+        log(f"❌ {result.error}")
+        return result
+
+    if first_batch is None:
+        if after is not None:
+            log(f"✅ {target_table} is up to date.")
+        else:
+            log(f"⚠️ Table {table_name} is empty—skipped.")
+        return result
+
+    if schema is not None:
+        log(f"🧬 {target_table}: " + ', '.join(f"{column.name} {column.sql_type}" for column in schema.columns))
+        converters = [value_converter(column.sql_type) for column in schema.columns]
+
+    try:
+        writer.create_table(target_table, columns, schema)
+        if options.upsert:
+            if can_upsert:
+                writer.start_upsert(target_table, columns, schema.primary_key)
+            else:
+                log(f"⚠️ {target_table}: upsert needs preserve_types and a primary key—rows are inserted.")
+    except Exception as e:
+        result.error = f"Error creating table {target_table}: {e}"
+        log(f"❌ {result.error}")
+        return result
+
+    try:
+        batch = first_batch
+        watermark = None
+        mark = time.perf_counter()
+        while batch is not None:
+            if watermark_column:
+                # The watermark value is read as an extra last field; parallel ranges arrive out of order
+                if parallel_read:
+                    watermark = max([row[-1] for row in batch] + ([watermark] if watermark is not None else []))
+                else:
+                    watermark = batch[-1][-1]
+                batch = [row[:-1] for row in batch]
+            rows = convert_rows(batch, converters) if schema is not None else rows_as_strings(batch)
+            mark = _record_phase(result, 'convert', mark)
+            writer.write_batch(target_table, columns, rows)
+            if watermark_column and not writer.loads_on_finish and not parallel_read:
+                writer.save_watermark(target_table, db_name, table_name, watermark_column, watermark, len(batch))
+            writer.commit()
+            result.rows += len(batch)
+            log(f"✅ Inserted {result.rows} rows into {target_table}")
+            mark = _record_phase(result, 'write', mark)
+            batch = next(batches, None)
+            mark = _record_phase(result, 'read', mark)
+        writer.finish_table(target_table, columns, log)
+        if watermark_column and (writer.loads_on_finish or parallel_read):
+            writer.save_watermark(target_table, db_name, table_name, watermark_column, watermark, result.rows)
+            writer.commit()
+        mark = _record_phase(result, 'finish', mark)
+
+        if schema is not None and schema.indexes:
+            created = writer.create_indexes(target_table, schema, log)
+            log(f"🗂️ {created}/{len(schema.indexes)} indexes on {target_table}")
+            _record_phase(result, 'indexes', mark)
+    except Exception as e:
+        result.error = f"Error inserting data into {target_table}: {e}"
+        log(f"❌ {result.error}")
+
+    result.seconds = time.perf_counter() - started
+    if not result.error:
+        log(f"🎯 Table {target_table} migrated successfully! ({result.rows} rows in {result.seconds:.1f}s)")
+    return result
+
+
+def _migrate_table_task(db_file: str, db_name: str, table_name: str, connection_string: str,
+                        options: MigrationOptions, connection_slots=None,
+                        log: Callable[[str], None] = print) -> TableResult:
+    # Worker entry point: its own SQLite reader and target writer
+    if connection_slots is not None:
+        connection_slots.acquire()
+    try:
+        conn_sqlite = open_sqlite_reader(db_file, options)
+        try:
+            writer = open_target_writer(connection_string, options)
+            try:
+                return migrate_table(conn_sqlite, writer, db_name, table_name, options, log)
+            finally:
+                writer.close()
+        finally:
+            conn_sqlite.close()
+    except Exception as e:
+        log(f"❌ {db_name}_{table_name}: {e}")
+        return TableResult(db_name, table_name, f"{db_name}_{table_name}", error=str(e))
+    finally:
+        if connection_slots is not None:
+            connection_slots.release()
+
+
+def list_migration_tasks(sqlite_databases: List[str],
+                         options: Optional[MigrationOptions] = None) -> List[Tuple[str, str, str, int]]:
+    """
+    List the tables of all databases with their estimated size
+
+    Returns:
+        (db_file, db_name, table_name, estimated_rows) tuples
+    """
+    tasks = []
+    for db_file in sqlite_databases:
+        db_name = os.path.basename(db_file).split('.')[0]
+        conn_sqlite = open_sqlite_reader(db_file, options)
+        try:
+            for table_name in list_tables(conn_sqlite):
+                tasks.append((db_file, db_name, table_name, estimate_rows(conn_sqlite, table_name)))
+        finally:
+            conn_sqlite.close()
+    return tasks
+
+
+def migrate_databases_parallel(sqlite_databases: List[str], connection_string: str,
+                               options: MigrationOptions, log: Callable[[str], None] = print) -> List[TableResult]:
+    """
+    Migrate tables of all databases concurrently, largest tables first
+
+    Every task opens its own SQLite reader and target writer.
+    Threads suit runs where the target is the bottleneck; processes also
+    spread the row conversion over several cores.
+
+    Args:
+        sqlite_databases: SQLite file paths
+        connection_string: pyodbc connection string, or the database file for a local writer
+        options: Run settings; workers, max_target_connections (0 = workers)
+                 and use_processes control the pool
+        log: Progress output
+
+    Returns:
+        One TableResult per table, in the order the tables were found
+    """
+    tasks = list_migration_tasks(sqlite_databases, options)
+    workers = max(1, options.workers)
+    limit = min(workers, options.max_target_connections) if options.max_target_connections else workers
+    limit = max(1, limit)
+    use_processes = options.use_processes
+    writer_class = TARGET_WRITERS.get(options.writer)
+    if use_processes and writer_class is not None and not writer_class.multi_process:
+        log(f"⚠️ The {options.writer} writer cannot be shared by several processes—using threads.")
+        use_processes = False
+    log(f"\n📦 Migrating {len(tasks)} tables from {len(sqlite_databases)} databases "
+        f"with {limit if use_processes else workers} {'processes' if use_processes else 'threads'} "
+        f"(at most {limit} target connections, {options.writer} writer)")
+
+    if use_processes:
+        # One connection per process, so the pool size is the connection limit
+        executor = ProcessPoolExecutor(max_workers=limit)
+        connection_slots = None
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers)
+        connection_slots = threading.BoundedSemaphore(limit)
+
+    # Starting the longest tables first keeps one huge table from finishing last on its own
+    schedule = sorted(range(len(tasks)), key=lambda index: tasks[index][3], reverse=True)
+    results: List[TableResult] = [None] * len(tasks)
+
+    with executor:
+        futures = {
+            executor.submit(_migrate_table_task, tasks[index][0], tasks[index][1], tasks[index][2],
+                            connection_string, options, connection_slots,
+                            print if use_processes else log): index
+            for index in schedule
+        }
+        for future, index in futures.items():
+            results[index] = future.result()
+
+    return results
+
+
+def migrate_databases(sqlite_databases: List[str], connection_string: str,
+                      options: Optional[MigrationOptions] = None,
+                      log: Callable[[str], None] = print) -> List[TableResult]:
+    """
+    Migrate every table of each SQLite database to the target
+
+    Args:
+        sqlite_databases: SQLite file paths
+        connection_string: pyodbc connection string, or the database file for a local writer
+        options: Run settings (batch size, type mapping, parallelism, writer)
+        log: Progress output
+
+    Returns:
+        One TableResult per table
+    """
+    options = options or MigrationOptions()
+    if options.workers > 1:
+        return migrate_databases_parallel(sqlite_databases, connection_string, options, log)
+
+    results = []
+    writer = open_target_writer(connection_string, options)
+    log(f"🚚 Writing with the {writer.name} writer")
+
+    try:
+        for db_file in sqlite_databases:
+            db_name = os.path.basename(db_file).split('.')[0]
+            log(f"\n📦 Processing SQLite DB: {db_file}")
+
+            conn_sqlite = open_sqlite_reader(db_file, options)
+            try:
+                for table_name in list_tables(conn_sqlite):
+                    results.append(migrate_table(conn_sqlite, writer, db_name, table_name, options, log))
+            finally:
+                conn_sqlite.close()
+    finally:
+        writer.close()
+
+    return results
+
+
+def print_summary(results: List[TableResult], log: Callable[[str], None] = print):
+    """Print rows, time and errors per table"""
+    failed = [result for result in results if result.error]
+    total_rows = sum(result.rows for result in results)
+    total_seconds = sum(result.seconds for result in results)
+
+    log("\n" + "=" * 60)
+    log("📊 MIGRATION SUMMARY")
+    for result in results:
+        status = "❌" if result.error else "✅"
+        log(f"{status} {result.target_table}: {result.rows} rows in {result.seconds:.1f}s")
+    log(f"Tables: {len(results)}, failed: {len(failed)}, rows: {total_rows}, "
+        f"table time: {total_seconds:.1f}s")
+    log("=" * 60)
+
+    if failed:
+        log("⚠️ Some tables were not migrated completely:")
+        for result in failed:
+            log(f"   {result.target_table}: {result.error}")
+    else:
+        log("🎉 All tables migrated successfully!")
@@ -0,0 +1,345 @@
+# sqlite_migration_benchmark.py
+
+import hashlib
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sqlite3
+import string
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Callable
+
+from sqlite_migration import MigrationOptions, migrate_databases
+
+# psutil reports the peak working set on Windows; resource covers Linux and macOS
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# Phases timed by migrate_table, in the order they run
+PHASES = ('schema', 'read', 'convert', 'write', 'finish', 'indexes')
+
+
+@dataclass
+class FixtureSpec:
+    """Shape of the synthetic SQLite databases a benchmark runs against"""
+    databases: int = 1
+    tables: int = 4
+    rows: int = 100000
+    # Columns per declared type besides the INTEGER PRIMARY KEY
+    columns: Dict[str, int] = field(default_factory=lambda: {
+        'INTEGER': 2, 'REAL': 1, 'TEXT': 3, 'DATETIME': 1, 'BLOB': 0
+    })
+    null_ratio: float = 0.1
+    text_length: int = 40
+    index_text_column: bool = True
+    seed: int = 42
+
+    def fingerprint(self) -> str:
+        """Short hash identifying fixtures with the same shape"""
+        return hashlib.sha1(json.dumps(asdict(self), sort_keys=True).encode('utf-8')).hexdigest()[:10]
+
+
+def _random_value(rng: random.Random, declared_type: str, text_length: int):
+    if declared_type == 'INTEGER':
+        return rng.randint(-2 ** 31, 2 ** 31 - 1)
+    if declared_type == 'REAL':
+        return rng.uniform(-1e6, 1e6)
+    if declared_type == 'DATETIME':
+        moment = datetime(2015, 1, 1) + timedelta(seconds=rng.randint(0, 10 * 365 * 86400))
+        return moment.strftime('%Y-%m-%d %H:%M:%S')
+    if declared_type == 'BLOB':
+        return rng.randbytes(rng.randint(1, text_length)) if hasattr(rng, 'randbytes') \
+            else bytes(rng.getrandbits(8) for _ in range(rng.randint(1, text_length)))
+    return ''.join(rng.choices(string.ascii_letters + string.digits + ' ', k=rng.randint(1, text_length)))
+
+
+def generate_fixtures(spec: FixtureSpec, fixture_dir: str, log: Callable[[str], None] = print) -> List[str]:
+    """
+    Create the SQLite databases described by spec, reusing existing ones
+
+    Files are named after the spec fingerprint and filled from a seeded
+    random generator, so every run with the same spec reads the same data.
+
+    Args:
+        spec: Databases, tables, rows, column types and NULL ratio
+        fixture_dir: Folder the databases are written to
+        log: Progress output
+
+    Returns:
+        Paths of the fixture databases
+    """
+    os.makedirs(fixture_dir, exist_ok=True)
+    paths = []
+    for db_number in range(spec.databases):
+        path = os.path.join(fixture_dir, f"bench_{spec.fingerprint()}_{db_number}.db")
+        paths.append(path)
+        if os.path.exists(path):
+            continue
+
+        log(f"🧪 Generating {path} ({spec.tables} tables × {spec.rows} rows)")
+        rng = random.Random(f"{spec.seed}-{db_number}")
+        columns = [(f"{declared_type.lower()}_{number}", declared_type)
+                   for declared_type, count in spec.columns.items() for number in range(count)]
+        temp_path = f"{path}.tmp"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        conn = sqlite3.connect(temp_path)
+        try:
+            conn.execute("PRAGMA journal_mode = OFF")
+            conn.execute("PRAGMA synchronous = OFF")
+            for table_number in range(spec.tables):
+                table_name = f"Table{table_number}"
+                column_sql = ''.join(f', "{name}" {declared_type}' for name, declared_type in columns)
+                conn.execute(f'CREATE TABLE "{table_name}" ("id" INTEGER PRIMARY KEY{column_sql})')
+                insert = f'INSERT INTO "{table_name}" VALUES ({", ".join("?" * (len(columns) + 1))})'
+                for start in range(1, spec.rows + 1, 10000):
+                    conn.executemany(insert, (
+                        (row_id,) + tuple(None if rng.random() < spec.null_ratio
+                                          else _random_value(rng, declared_type, spec.text_length)
+                                          for _, declared_type in columns)
+                        for row_id in range(start, min(start + 10000, spec.rows + 1))
+                    ))
+                text_columns = [name for name, declared_type in columns if declared_type == 'TEXT']
+                if spec.index_text_column and text_columns:
+                    conn.execute(f'CREATE INDEX "IX_{table_name}_{text_columns[0]}" '
+                                 f'ON "{table_name}" ("{text_columns[0]}")')
+                conn.commit()
+        finally:
+            conn.close()
+        os.replace(temp_path, path)
+    return paths
+
+
+def peak_rss_bytes(children: bool = False) -> Optional[int]:
+    """
+    Return the peak resident memory of this process, or None if it cannot be read
+
+    With children=True, return the peak of the largest finished child process
+    instead (the use_processes workers), or None if none has finished or the
+    platform cannot tell. The operating system keeps only the largest child,
+    so this is not the sum over several workers.
+    """
+    if psutil is not None and not children:
+        memory = psutil.Process().memory_info()
+        peak = getattr(memory, 'peak_wset', None)  # Windows only
+        if peak:
+            return int(peak)
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+        if not peak:
+            return None
+        # Kilobytes on Linux, bytes on macOS
+        return int(peak if platform.system() == 'Darwin' else peak * 1024)
+    return None
+
+
+def _megabytes(size: Optional[int]) -> Optional[float]:
+    return round(size / (1024 * 1024), 1) if size is not None else None
+
+
+def _format_rss(result: Dict[str, Any]) -> str:
+    # Peak RSS of the run, with its largest worker process when it used any
+    text = f"peak RSS {result['peak_rss_mb']} MB"
+    if result.get('children_peak_rss_mb') is not None:
+        text += f" (largest worker {result['children_peak_rss_mb']} MB)"
+    return text
+
+
+def run_strategy(name: str, fixture_paths: List[str], target: str, settings: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Migrate the fixtures with one strategy and measure it
+
+    Meant to run in a fresh process, so the peak RSS belongs to this
+    strategy alone. peak_rss_mb covers that process only; with
+    use_processes the largest worker is reported in children_peak_rss_mb.
+    Phase times are summed over tables and can exceed the wall time when
+    tables or reads run in parallel.
+
+    Args:
+        name: Strategy name
+        fixture_paths: SQLite fixture databases
+        target: Local target file (sqlite or duckdb writer), recreated first
+        settings: MigrationOptions fields for this strategy
+
+    Returns:
+        Dictionary with rows, seconds, rows_per_second, peak_rss_mb,
+        children_peak_rss_mb, phase_seconds and errors
+    """
+    for path in (target, f"{target}-wal", f"{target}-shm", f"{target}.wal"):
+        if os.path.exists(path):
+            os.remove(path)
+
+    options = MigrationOptions(**settings)
+    started = time.perf_counter()
+    results = migrate_databases(fixture_paths, target, options, log=lambda message: None)
+    seconds = time.perf_counter() - started
+
+    phase_seconds: Dict[str, float] = {}
+    for result in results:
+        for phase, phase_time in result.phase_seconds.items():
+            phase_seconds[phase] = phase_seconds.get(phase, 0.0) + phase_time
+    rows = sum(result.rows for result in results)
+
+    return {
+        'strategy': name,
+        'settings': settings,
+        'tables': len(results),
+        'rows': rows,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(rows / seconds, 1) if seconds > 0 else 0.0,
+        'peak_rss_mb': _megabytes(peak_rss_bytes()),
+        'children_peak_rss_mb': _megabytes(peak_rss_bytes(children=True)),
+        'phase_seconds': {phase: round(phase_seconds[phase], 3) for phase in PHASES if phase in phase_seconds},
+        'errors': [f"{result.target_table}: {result.error}" for result in results if result.error]
+    }
+
+
+def run_benchmark(spec: FixtureSpec, strategies: Dict[str, Dict[str, Any]], work_dir: str,
+                  repeats: int = 1, log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """
+    Run every strategy against the same fixtures and a local target
+
+    Each run gets its own spawned process and a fresh target file. With
+    several repeats the run with the median rows/s is reported.
+
+    Args:
+        spec: Fixture shape
+        strategies: Strategy name to MigrationOptions fields; the writer must be 'sqlite' or 'duckdb'
+        work_dir: Folder for fixtures and target files
+        repeats: Runs per strategy
+        log: Progress output
+
+    Returns:
+        Run record with environment, fixture spec and one result per strategy
+    """
+    fixture_paths = generate_fixtures(spec, os.path.join(work_dir, 'fixtures'), log)
+    context = multiprocessing.get_context('spawn')
+    strategy_results = []
+
+    for name, settings in strategies.items():
+        writer = settings.get('writer', 'sqlite')
+        if writer not in ('sqlite', 'duckdb'):
+            log(f"⚠️ {name}: only the local 'sqlite' and 'duckdb' writers can be benchmarked—skipped.")
+            continue
+        target = os.path.join(work_dir, f"target_{name}.{writer}")
+        runs = []
+        for repeat in range(max(1, repeats)):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                run = executor.submit(run_strategy, name, fixture_paths, target, dict(settings)).result()
+            runs.append(run)
+            log(f"⏱️ {name} run {repeat + 1}: {run['rows']} rows in {run['seconds']:.1f}s "
+                f"({run['rows_per_second']:.0f} rows/s, {_format_rss(run)})")
+        runs.sort(key=lambda item: item['rows_per_second'])
+        median = runs[len(runs) // 2]
+        median['repeats'] = len(runs)
+        median['rows_per_second_all'] = [item['rows_per_second'] for item in runs]
+        strategy_results.append(median)
+
+    return {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'cpu_count': os.cpu_count()
+        },
+        'fixture': dict(asdict(spec), fingerprint=spec.fingerprint(),
+                        total_rows=spec.databases * spec.tables * spec.rows),
+        'results': strategy_results
+    }
+
+
+def save_results(run: Dict[str, Any], results_file: str):
+    """Append a run record to the JSON results file (rewritten atomically)"""
+    runs = []
+    if os.path.exists(results_file):
+        with open(results_file, 'r', encoding='utf-8') as f:
+            runs = json.load(f)
+    runs.append(run)
+    temp_file = f"{results_file}.tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(runs, f, indent=2)
+    os.replace(temp_file, results_file)
+
+
+def print_benchmark(run: Dict[str, Any], previous_runs: Optional[List[Dict[str, Any]]] = None,
+                    log: Callable[[str], None] = print):
+    """
+    Print one line per strategy, fastest first
+
+    Args:
+        run: Run record from run_benchmark
+        previous_runs: Earlier run records; the last one with the same fixture
+                       fingerprint is used to show the change in rows/s
+        log: Output
+    """
+    baseline = {}
+    for previous in previous_runs or []:
+        if previous.get('fixture', {}).get('fingerprint') == run['fixture']['fingerprint']:
+            baseline = {result['strategy']: result['rows_per_second'] for result in previous['results']}
+
+    log("\n" + "=" * 60)
+    log(f"📊 BENCHMARK ({run['fixture']['total_rows']} rows, fixture {run['fixture']['fingerprint']})")
+    for result in sorted(run['results'], key=lambda item: -item['rows_per_second']):
+        change = ""
+        if baseline.get(result['strategy']):
+            change = f" ({(result['rows_per_second'] / baseline[result['strategy']] - 1) * 100:+.0f}% vs last run)"
+        phases = ', '.join(f"{phase} {seconds:.1f}s" for phase, seconds in result['phase_seconds'].items())
+        status = "❌" if result['errors'] else "✅"
+        log(f"{status} {result['strategy']}: {result['rows_per_second']:.0f} rows/s{change}, "
+            f"{result['seconds']:.1f}s, {_format_rss(result)}")
+        log(f"   {phases}")
+        for error in result['errors']:
+            log(f"   {error}")
+    log("=" * 60)
+
+
+# 🧪 Synthetic fixtures: databases, tables, rows per table, columns per declared type and NULL share
+fixture = FixtureSpec(
+    databases=1,
+    tables=4,
+    rows=100000,
+    columns={'INTEGER': 2, 'REAL': 1, 'TEXT': 3, 'DATETIME': 1, 'BLOB': 0},
+    null_ratio=0.1,
+    text_length=40
+)
+
+# 🚚 Strategies: MigrationOptions fields per run, all written to a local 'sqlite' or 'duckdb' target.
+# The first three match the batch sizes of the migration scripts
+strategies = {
+    'all_strings': {'writer': 'sqlite', 'batch_size': 10000},
+    'all_strings_chunks': {'writer': 'sqlite', 'batch_size': 1000},
+    'all_string_chunks_diff': {'writer': 'sqlite', 'batch_size': 5000},
+    'untyped_text': {'writer': 'sqlite', 'batch_size': 10000, 'preserve_types': False},
+    'parallel_tables': {'writer': 'sqlite', 'batch_size': 10000, 'workers': 4},
+    'duckdb': {'writer': 'duckdb', 'batch_size': 10000}
+}
+
+# 📁 Fixtures and targets go to work_dir; every run is appended to results_file
+work_dir = r"C:\Path\To\migration_benchmark"
+results_file = r"C:\Path\To\migration_benchmark\results.json"
+repeats = 1
+
+if __name__ == "__main__":
+    previous_runs = []
+    if os.path.exists(results_file):
+        with open(results_file, 'r', encoding='utf-8') as f:
+            previous_runs = json.load(f)
+
+    benchmark = run_benchmark(fixture, strategies, work_dir, repeats)
+    print_benchmark(benchmark, previous_runs)
+    save_results(benchmark, results_file)
+    print(f"💾 Results appended to {results_file}")
@@ -1,7 +1,5 @@
-import sqlite3
-import pyodbc
-import pandas as pd
-import os
+from sqlite_migration import sql_server_connection_string, migrate_databases, print_summary, MigrationOptions
+from sqlite_verification import verify_databases, print_verification_summary
 
 # 🔐 SQL Server configuration
 sql_server = 'YOUR_SQL_SERVER'
@@ -15,72 +13,81 @@ sqlite_databases = [
     r"C:\Path\To\YourDB2.db"
 ]
 
-# ⚙️ Connect to SQL Server
-conn_sql = pyodbc.connect(
-    f'DRIVER={{SQL Server}};SERVER={sql_server};DATABASE={sql_database};UID={sql_username};PWD={sql_password}'
-)
-cursor_sql = conn_sql.cursor()
+# ⚙️ Rows per fetchmany/executemany batch
+chunk_size = 5000
 
-# 🚚 Process each SQLite DB
-for db_file in sqlite_databases:
-    db_name = os.path.basename(db_file).split('.')[0]
-    print(f"\n📦 Processing: {db_file}")
+# ⚡ Tables migrated in parallel (1 = one after another), limit on SQL Server connections,
+# and processes instead of threads to spread row conversion over several cores
+workers = 1
+max_target_connections = 0
+use_processes = False
 
-    conn_sqlite = sqlite3.connect(db_file)
-    cursor_sqlite = conn_sqlite.cursor()
+# 🧬 Sized column types (INT/BIGINT, FLOAT, DATETIME2, NVARCHAR(n)), primary keys and indexes
+# chosen from the SQLite schema and the whole table (or a sample of rows, with text kept NVARCHAR(MAX));
+# False keeps every column NVARCHAR(MAX) text
+preserve_types = True
+sample_rows = 0
 
-    # 🔍 Fetch table names
-    cursor_sqlite.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    tables = [table[0] for table in cursor_sqlite.fetchall()]
+# 🚚 Load strategy: 'executemany' (parameterized, fast_executemany), 'multirow' (multi-row VALUES),
+# 'bcp' (bulk copy from staging files in staging_dir, needs the bcp utility), or 'sqlite'/'duckdb'
+# to load into the local_target file instead of SQL Server for testing and benchmarking
+writer = 'executemany'
+staging_dir = ''
+local_target = r"C:\Path\To\migration_test.db"
 
-    for table_name in tables:
-        new_table_name = f"{db_name}_{table_name}"
-        print(f"🔄 Migrating table: {table_name} → {new_table_name}")
+# 📖 Tables of at least parallel_read_min_rows rows are read by read_workers connections over
+# rowid ranges; sources are opened read-only with mmap_size_mb of memory-mapped I/O and
+# cache_size_mb of page cache. immutable skips file locking (only for DB files nothing writes to)
+read_workers = 1
+read_range_rows = 200000
+parallel_read_min_rows = 1000000
+mmap_size_mb = 1024
+cache_size_mb = 256
+immutable = False
 
-        try:
-            df_sqlite = pd.read_sql_query(f"SELECT * FROM {table_name}", conn_sqlite)
-            df_sqlite = df_sqlite.astype(str)
-        except Exception as e:
-            print(f"❌ Failed to read table {table_name}: {e}")
-            continue
+# 🔁 Incremental reruns: only rows above each table's high-water mark (rowid, or a monotonic column
+# per table such as {'Documents': 'ModifiedOn'}) are copied; marks are kept in migration_watermarks.
+# upsert updates rows whose primary key already exists instead of adding them
+incremental = False
+watermark_columns = {}
+upsert = False
 
-        if not df_sqlite.empty:
-            try:
-                column_defs = ', '.join([f"[{col}] NVARCHAR(MAX)" for col in df_sqlite.columns])
-                cursor_sql.execute(f"""
-                    IF NOT EXISTS (
-                        SELECT * FROM INFORMATION_SCHEMA.TABLES
-                        WHERE TABLE_NAME = '{new_table_name}'
-                    )
-                    BEGIN
-                        CREATE TABLE [{new_table_name}] ({column_defs})
-                    END
-                """)
-                conn_sql.commit()
-            except Exception as e:
-                print(f"❌ Error creating table {new_table_name}: {e}")
-                continue
+# 🔍 Compare source and target after the migration with order-independent checksums per chunk
+# of verify_chunk_rows primary key values; recopy_differences deletes and copies differing chunks again
+verify = False
+verify_chunk_rows = 100000
+verify_workers = 4
+recopy_differences = False
 
-            # ✅ Prepare insert query
-            placeholders = ', '.join(['?' for _ in df_sqlite.columns])
-            column_list = ', '.join([f"[{col}]" for col in df_sqlite.columns])
-            insert_query = f"INSERT INTO [{new_table_name}] ({column_list}) VALUES ({placeholders})"
+if __name__ == "__main__":
+    # 🚚 Process each SQLite DB (memory-efficient: rows stream from the SQLite cursor)
+    target = local_target if writer in ('sqlite', 'duckdb') else \
+        sql_server_connection_string(sql_server, sql_database, sql_username, sql_password)
+    options = MigrationOptions(
+        batch_size=chunk_size,
+        preserve_types=preserve_types,
+        sample_rows=sample_rows,
+        workers=workers,
+        max_target_connections=max_target_connections,
+        use_processes=use_processes,
+        writer=writer,
+        staging_dir=staging_dir,
+        incremental=incremental,
+        watermark_columns=watermark_columns,
+        upsert=upsert,
+        read_workers=read_workers,
+        read_range_rows=read_range_rows,
+        parallel_read_min_rows=parallel_read_min_rows,
+        mmap_size_mb=mmap_size_mb,
+        cache_size_mb=cache_size_mb,
+        immutable=immutable
+    )
+    results = migrate_databases(sqlite_databases, target, options)
 
-            # 🚀 Use memory-efficient row iterator
-            try:
-                cursor_sql.fast_executemany = True
-                rows = df_sqlite.itertuples(index=False, name=None)
-                cursor_sql.executemany(insert_query, rows)
-                conn_sql.commit()
-                print(f"✅ Inserted {len(df_sqlite)} rows into {new_table_name}")
-            except Exception as e:
-                print(f"❌ Error inserting into {new_table_name}: {e}")
-                continue
-        else:
-            print(f"⚠️ Table {table_name} is empty—skipped.")
+    # 🧹 Finalize
+    print_summary(results)
 
-    conn_sqlite.close()
-
-# 🧹 Finalize
-conn_sql.close()
-print("\n🎉 All tables migrated successfully!")
+    if verify:
+        # 🔍 Chunk checksums on both sides, in parallel
+        print_verification_summary(verify_databases(sqlite_databases, target, options, verify_chunk_rows,
+                                                    verify_workers, recopy_differences))
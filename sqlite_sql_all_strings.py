@@ -1,7 +1,5 @@
-import sqlite3
-import pyodbc
-import pandas as pd
-import os
+from sqlite_migration import sql_server_connection_string, migrate_databases, print_summary, MigrationOptions
+from sqlite_verification import verify_databases, print_verification_summary
 
 # 🛡️ SQL Server connection details
 sql_server = 'YOUR_SQL_SERVER'       # e.g., 'localhost\\SQLEXPRESS'
@@ -9,73 +7,86 @@ sql_database = 'YOUR_DATABASE'
 sql_username = 'YOUR_USERNAME'
 sql_password = 'YOUR_PASSWORD'
 
-# 🔗 Connect to SQL Server
-conn_sql = pyodbc.connect(
-    f'DRIVER={{SQL Server}};SERVER={sql_server};DATABASE={sql_database};UID={sql_username};PWD={sql_password}'
-)
-cursor_sql = conn_sql.cursor()
-
 # 📋 List of SQLite databases to process
 sqlite_databases = [
     r"C:\Path\To\RSRMatter.db"  # Add more paths as needed
 ]
 
-# 🚚 Migrate each SQLite DB
-for db_file in sqlite_databases:
-    db_name = os.path.basename(db_file).split('.')[0]  # Extract base name
-
-    # 🔌 Connect to SQLite
-    conn_sqlite = sqlite3.connect(db_file)
-    cursor_sqlite = conn_sqlite.cursor()
+# 📏 Rows read and inserted per batch (only one batch is held in memory)
+batch_size = 10000
 
-    # 🧠 Fetch table names
-    cursor_sqlite.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    tables = [row[0] for row in cursor_sqlite.fetchall()]
+# ⚡ Tables migrated in parallel (1 = one after another), limit on SQL Server connections,
+# and processes instead of threads to spread row conversion over several cores
+workers = 1
+max_target_connections = 0
+use_processes = False
 
-    for table_name in tables:
-        new_table_name = f"{db_name}_{table_name}"
+# 🧬 Sized column types (INT/BIGINT, FLOAT, DATETIME2, NVARCHAR(n)), primary keys and indexes
+# chosen from the SQLite schema and the whole table (or a sample of rows, with text kept NVARCHAR(MAX));
+# False keeps every column NVARCHAR(MAX) text
+preserve_types = True
+sample_rows = 0
 
-        # 📥 Load SQLite table into DataFrame
-        df_sqlite = pd.read_sql_query(f"SELECT * FROM {table_name}", conn_sqlite)
+# 🚚 Load strategy: 'executemany' (parameterized, fast_executemany), 'multirow' (multi-row VALUES),
+# 'bcp' (bulk copy from staging files in staging_dir, needs the bcp utility), or 'sqlite'/'duckdb'
+# to load into the local_target file instead of SQL Server for testing and benchmarking
+writer = 'executemany'
+staging_dir = ''
+local_target = r"C:\Path\To\migration_test.db"
 
-        # 🔄 Force all data to string to avoid insert type issues
-        df_sqlite = df_sqlite.astype(str)
+# 📖 Tables of at least parallel_read_min_rows rows are read by read_workers connections over
+# rowid ranges; sources are opened read-only with mmap_size_mb of memory-mapped I/O and
+# cache_size_mb of page cache. immutable skips file locking (only for DB files nothing writes to)
+read_workers = 1
+read_range_rows = 200000
+parallel_read_min_rows = 1000000
+mmap_size_mb = 1024
+cache_size_mb = 256
+immutable = False
 
-        if not df_sqlite.empty:
-            try:
-                # 🔨 Create table if it doesn't exist
-                column_definitions = ', '.join([f"[{col}] NVARCHAR(MAX)" for col in df_sqlite.columns])
-                cursor_sql.execute(f"""
-                    IF NOT EXISTS (
-                        SELECT * FROM INFORMATION_SCHEMA.TABLES
-                        WHERE TABLE_NAME = '{new_table_name}'
-                    )
-                    BEGIN
-                        CREATE TABLE [{new_table_name}] ({column_definitions})
-                    END
-                """)
-                conn_sql.commit()
-            except Exception as e:
-                print(f"❌ Error creating table {new_table_name}: {e}")
-                continue
+# 🔁 Incremental reruns: only rows above each table's high-water mark (rowid, or a monotonic column
+# per table such as {'Documents': 'ModifiedOn'}) are copied; marks are kept in migration_watermarks.
+# upsert updates rows whose primary key already exists instead of adding them
+incremental = False
+watermark_columns = {}
+upsert = False
 
-            try:
-                # 🚀 Bulk insert data
-                placeholders = ', '.join(['?' for _ in df_sqlite.columns])
-                columns_formatted = ', '.join([f"[{col}]" for col in df_sqlite.columns])
-                insert_query = f"INSERT INTO [{new_table_name}] ({columns_formatted}) VALUES ({placeholders})"
-                
-                cursor_sql.fast_executemany = True
-                cursor_sql.executemany(insert_query, df_sqlite.values.tolist())
-                conn_sql.commit()
+# 🔍 Compare source and target after the migration with order-independent checksums per chunk
+# of verify_chunk_rows primary key values; recopy_differences deletes and copies differing chunks again
+verify = False
+verify_chunk_rows = 100000
+verify_workers = 4
+recopy_differences = False
 
-                print(f"✅ {new_table_name} migrated successfully!")
-            except Exception as e:
-                print(f"❌ Error inserting data into {new_table_name}: {e}")
-                continue
+if __name__ == "__main__":
+    # 🚚 Migrate each SQLite DB, streaming every table with fetchmany → executemany
+    target = local_target if writer in ('sqlite', 'duckdb') else \
+        sql_server_connection_string(sql_server, sql_database, sql_username, sql_password)
+    options = MigrationOptions(
+        batch_size=batch_size,
+        preserve_types=preserve_types,
+        sample_rows=sample_rows,
+        workers=workers,
+        max_target_connections=max_target_connections,
+        use_processes=use_processes,
+        writer=writer,
+        staging_dir=staging_dir,
+        incremental=incremental,
+        watermark_columns=watermark_columns,
+        upsert=upsert,
+        read_workers=read_workers,
+        read_range_rows=read_range_rows,
+        parallel_read_min_rows=parallel_read_min_rows,
+        mmap_size_mb=mmap_size_mb,
+        cache_size_mb=cache_size_mb,
+        immutable=immutable
+    )
+    results = migrate_databases(sqlite_databases, target, options)
 
-    conn_sqlite.close()
+    # 🧹 Summary
+    print_summary(results)
 
-# 🧹 Cleanup
-conn_sql.close()
-print("🎉 All tables migrated successfully!")
+    if verify:
+        # 🔍 Chunk checksums on both sides, in parallel
+        print_verification_summary(verify_databases(sqlite_databases, target, options, verify_chunk_rows,
+                                                    verify_workers, recopy_differences))
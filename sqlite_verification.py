@@ -0,0 +1,355 @@
+# sqlite_verification.py
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import List, Optional, Tuple, Callable, Any
+
+from sqlite_migration import (
+    MigrationOptions, TableSchema, list_tables, map_table_schema, value_converter, convert_rows,
+    rows_as_strings, open_target_writer, open_sqlite_reader, quote_sqlite, key_range_filter, TARGET_WRITERS
+)
+
+HASH_MODULUS = 2 ** 64
+
+
+@dataclass
+class ChunkDifference:
+    """Key range whose row count or checksum differs between source and target"""
+    low: Any
+    high: Any
+    source_rows: int
+    target_rows: int
+    recopied: bool = False
+
+
+@dataclass
+class VerificationResult:
+    """Outcome of verifying one migrated table"""
+    source_db: str
+    table_name: str
+    target_table: str
+    key_column: str = ""
+    chunks: int = 0
+    source_rows: int = 0
+    target_rows: int = 0
+    differences: List[ChunkDifference] = field(default_factory=list)
+    seconds: float = 0.0
+    error: str = ""
+
+
+def _canonical_other(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, (date, bytes, bytearray, memoryview)):
+        return canonical_value(value)
+    return str(value)
+
+
+# Type-to-text functions looked up once per value; checksums spend most of their time here
+_CANONICAL = {
+    type(None): lambda value: '\x00',
+    str: str,
+    int: int.__repr__,
+    bool: lambda value: '1' if value else '0',
+    float: float.__repr__,
+    datetime: lambda value: value.isoformat(sep=' '),
+    date: date.isoformat,
+    bytes: bytes.hex,
+    bytearray: bytearray.hex,
+    memoryview: lambda value: value.hex()
+}
+
+
+def canonical_value(value: Any) -> str:
+    """Render a value the same way whichever side it was read from"""
+    return _CANONICAL.get(type(value), _canonical_other)(value)
+
+
+def rows_checksum(rows) -> Tuple[int, int]:
+    """
+    Return (row count, checksum) of rows in any order
+
+    Each row is hashed on its own and the hashes are added modulo 2**64,
+    so the result does not depend on the order rows are read in, and
+    duplicated or missing rows change it.
+    """
+    count = 0
+    total = 0
+    canonical = _CANONICAL
+    for row in rows:
+        text = '\x1f'.join([canonical.get(type(value), _canonical_other)(value) for value in row])
+        total += int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+        count += 1
+    return count, total % HASH_MODULUS
+
+
+def integer_key_column(schema: Optional[TableSchema]) -> Optional[str]:
+    """
+    Return the single integer primary key column used to split a table into ranges
+
+    For an INTEGER PRIMARY KEY this is the rowid itself. Tables without
+    one, and runs without preserve_types (text keys), are checked as a
+    single chunk.
+    """
+    if schema is None or len(schema.primary_key) != 1:
+        return None
+    key = schema.primary_key[0]
+    column = next(column for column in schema.columns if column.name == key)
+    return key if column.sql_type in ("INT", "BIGINT") else None
+
+
+def chunk_ranges(conn_sqlite: sqlite3.Connection, table_name: str, key_column: Optional[str],
+                 chunk_rows: int) -> List[Tuple[Any, Any]]:
+    """
+    Split a table into [low, high) key ranges of chunk_rows rows each
+
+    The first range has no lower bound and the last none upper bound (None),
+    so target rows with keys outside the source's key span are still compared.
+    """
+    if not key_column:
+        return [(None, None)]
+    key, table = quote_sqlite(key_column), quote_sqlite(table_name)
+    # Step over the keys that exist, so sparse keys give no empty ranges
+    ranges = []
+    low = None
+    while True:
+        condition, parameters = key_range_filter(key, low, None)
+        row = conn_sqlite.execute(f"SELECT {key} FROM {table}{condition} ORDER BY {key} LIMIT 1 OFFSET ?",
+                                  parameters + [chunk_rows]).fetchone()
+        if row is None:
+            ranges.append((low, None))
+            return ranges
+        ranges.append((low, row[0]))
+        low = row[0]
+
+
+def _bound(value: Any) -> str:
+    # Open range ends print as … in the log
+    return '…' if value is None else str(value)
+
+
+class _ChunkVerifier:
+    # One SQLite reader and one target writer per worker thread or process
+
+    def __init__(self, db_file: str, connection_string: str, options: MigrationOptions):
+        self.db_file = db_file
+        self.connection_string = connection_string
+        self.options = options
+        self._local = threading.local()
+        self._opened = []
+        self._lock = threading.Lock()
+
+    def connections(self):
+        if getattr(self._local, 'conn_sqlite', None) is None:
+            self._local.conn_sqlite = open_sqlite_reader(self.db_file, self.options)
+            self._local.writer = open_target_writer(self.connection_string, self.options)
+            with self._lock:
+                self._opened.append((self._local.conn_sqlite, self._local.writer))
+        return self._local.conn_sqlite, self._local.writer
+
+    def source_rows(self, conn_sqlite: sqlite3.Connection, table_name: str, key_column: Optional[str],
+                    low: Any, high: Any, schema: Optional[TableSchema]):
+        query = f"SELECT * FROM {quote_sqlite(table_name)}"
+        parameters = []
+        if key_column:
+            condition, parameters = key_range_filter(quote_sqlite(key_column), low, high)
+            query += condition
+        cursor = conn_sqlite.execute(query, parameters)
+        converters = [value_converter(column.sql_type) for column in schema.columns] if schema else None
+        try:
+            while True:
+                rows = cursor.fetchmany(self.options.batch_size)
+                if not rows:
+                    break
+                # Compare what was written: the same conversion the migration applied
+                yield convert_rows(rows, converters) if converters else rows_as_strings(rows)
+        finally:
+            cursor.close()
+
+    def verify(self, table_name: str, target_table: str, columns: List[str], key_column: Optional[str],
+               low: Any, high: Any, schema: Optional[TableSchema]) -> Tuple[int, int, int, int]:
+        conn_sqlite, writer = self.connections()
+        source = rows_checksum(row for batch in self.source_rows(conn_sqlite, table_name, key_column, low, high, schema)
+                               for row in batch)
+        target = rows_checksum(row for batch in writer.read_rows(target_table, columns, key_column, low, high,
+                                                                  self.options.batch_size)
+                               for row in batch)
+        return source[0], source[1], target[0], target[1]
+
+    def recopy(self, table_name: str, target_table: str, columns: List[str], key_column: Optional[str],
+               low: Any, high: Any, schema: Optional[TableSchema]):
+        conn_sqlite, writer = self.connections()
+        writer.delete_rows(target_table, key_column, low, high)
+        if writer.loads_on_finish:
+            # bcp loads over its own connection, which would wait on the open delete
+            writer.commit()
+        writer.create_table(target_table, columns, schema)
+        for rows in self.source_rows(conn_sqlite, table_name, key_column, low, high, schema):
+            writer.write_batch(target_table, columns, rows)
+        writer.finish_table(target_table, columns, lambda message: None)
+        writer.commit()
+
+    def close(self):
+        with self._lock:
+            for conn_sqlite, writer in self._opened:
+                conn_sqlite.close()
+                writer.close()
+            self._opened.clear()
+
+
+_process_verifier: Optional[_ChunkVerifier] = None
+
+
+def _init_process_verifier(db_file: str, connection_string: str, options: MigrationOptions):
+    global _process_verifier
+    _process_verifier = _ChunkVerifier(db_file, connection_string, options)
+
+
+def _verify_chunk_in_process(*args) -> Tuple[int, int, int, int]:
+    return _process_verifier.verify(*args)
+
+
+def verify_table(db_file: str, table_name: str, connection_string: str,
+                 options: Optional[MigrationOptions] = None, chunk_rows: int = 100000, workers: int = 4,
+                 recopy: bool = False, log: Callable[[str], None] = print) -> VerificationResult:
+    """
+    Compare a SQLite table with its migrated copy chunk by chunk
+
+    The table is split into ranges of its integer primary key (the rowid
+    for INTEGER PRIMARY KEY tables); the outer ranges are open so target
+    rows beyond the source keys are caught, and the target's COUNT(*) must
+    match the rows the ranges account for. Both sides of each range are read in
+    parallel and reduced to a row count and an order-independent
+    checksum, so only counts and checksums are kept in memory. Tables
+    without an integer key are compared as one chunk.
+
+    Args:
+        db_file: SQLite database path
+        table_name: Table to verify
+        connection_string: Target as given to migrate_databases
+        options: The options the table was migrated with (type mapping and writer);
+                 use_processes spreads the hashing over several cores (threads are
+                 used for the duckdb target, which one process holds open)
+        chunk_rows: Keys per chunk
+        workers: Chunks verified at the same time
+        recopy: Delete and copy again every chunk that differs
+        log: Progress output
+
+    Returns:
+        VerificationResult listing the differing chunks
+    """
+    options = options or MigrationOptions()
+    db_name = os.path.basename(db_file).split('.')[0]
+    target_table = f"{db_name}_{table_name}"
+    result = VerificationResult(db_name, table_name, target_table)
+    started = time.perf_counter()
+
+    conn_sqlite = open_sqlite_reader(db_file, options)
+    try:
+        schema = map_table_schema(conn_sqlite, table_name, options.sample_rows, lambda message: None) \
+            if options.preserve_types else None
+        columns = [row[1] for row in conn_sqlite.execute(f"PRAGMA table_info({quote_sqlite(table_name)})")]
+        key_column = integer_key_column(schema)
+        ranges = chunk_ranges(conn_sqlite, table_name, key_column, max(1, chunk_rows))
+    except Exception as e:
+        result.error = f"Failed to read table {table_name}: {e}"
+        log(f"❌ {result.error}")
+        return result
+    finally:
+        conn_sqlite.close()
+
+    result.key_column = key_column or ""
+    result.chunks = len(ranges)
+    log(f"🔍 Verifying {target_table}: {len(ranges)} chunks"
+        + (f" of {chunk_rows} {key_column} values" if key_column else " (no integer key, whole table)"))
+
+    verifier = _ChunkVerifier(db_file, connection_string, options)
+    chunk_args = [(table_name, target_table, columns, key_column, low, high, schema) for low, high in ranges]
+    try:
+        writer_class = TARGET_WRITERS.get(options.writer)
+        if options.use_processes and workers > 1 and (writer_class is None or writer_class.multi_process):
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_process_verifier,
+                                           initargs=(db_file, connection_string, options))
+            verify_chunk = _verify_chunk_in_process
+        else:
+            executor = ThreadPoolExecutor(max_workers=max(1, workers))
+            verify_chunk = verifier.verify
+
+        with executor:
+            outcomes = list(executor.map(verify_chunk, *zip(*chunk_args)))
+
+        for (low, high), (source_rows, source_sum, target_rows, target_sum) in zip(ranges, outcomes):
+            result.source_rows += source_rows
+            result.target_rows += target_rows
+            if source_rows != target_rows or source_sum != target_sum:
+                result.differences.append(ChunkDifference(low, high, source_rows, target_rows))
+
+        # Rows the key ranges cannot reach (NULL keys) would otherwise go unnoticed
+        _, writer = verifier.connections()
+        total_rows = writer.count_rows(target_table)
+        if total_rows != result.target_rows:
+            result.error = (f"{target_table} holds {total_rows} rows but its key ranges "
+                            f"account for {result.target_rows}")
+            log(f"❗ {result.error}")
+            result.target_rows = total_rows
+
+        for difference in result.differences:
+            log(f"❗ {target_table}: chunk {key_column or 'table'} "
+                f"{'' if not key_column else f'[{_bound(difference.low)}, {_bound(difference.high)}) '}"
+                f"differs ({difference.source_rows} source rows, {difference.target_rows} target rows)")
+            if recopy:
+                verifier.recopy(table_name, target_table, columns, key_column, difference.low, difference.high, schema)
+                difference.recopied = True
+                log(f"🔁 Chunk copied again ({difference.source_rows} rows)")
+    except Exception as e:
+        result.error = f"Error verifying {target_table}: {e}"
+        log(f"❌ {result.error}")
+    finally:
+        verifier.close()
+
+    result.seconds = time.perf_counter() - started
+    if not result.error and not result.differences:
+        log(f"✅ {target_table} matches ({result.source_rows} rows in {result.seconds:.1f}s)")
+    return result
+
+
+def verify_databases(sqlite_databases: List[str], connection_string: str,
+                     options: Optional[MigrationOptions] = None, chunk_rows: int = 100000, workers: int = 4,
+                     recopy: bool = False, log: Callable[[str], None] = print) -> List[VerificationResult]:
+    """Verify every table of each SQLite database against the target (see verify_table)"""
+    results = []
+    for db_file in sqlite_databases:
+        log(f"\n📦 Verifying SQLite DB: {db_file}")
+        conn_sqlite = open_sqlite_reader(db_file, options)
+        try:
+            tables = list_tables(conn_sqlite)
+        finally:
+            conn_sqlite.close()
+        for table_name in tables:
+            results.append(verify_table(db_file, table_name, connection_string, options, chunk_rows, workers,
+                                        recopy, log))
+    return results
+
+
+def print_verification_summary(results: List[VerificationResult], log: Callable[[str], None] = print):
+    """Print row counts and differing chunks per table"""
+    log("\n" + "=" * 60)
+    log("🔍 VERIFICATION SUMMARY")
+    for result in results:
+        if result.error:
+            status = "❌"
+        elif result.differences:
+            status = "🔁" if all(difference.recopied for difference in result.differences) else "❗"
+        else:
+            status = "✅"
+        log(f"{status} {result.target_table}: {result.source_rows} source / {result.target_rows} target rows, "
+            f"{len(result.differences)} of {result.chunks} chunks differ ({result.seconds:.1f}s)")
+    differing = [result for result in results if result.differences or result.error]
+    log(f"Tables: {len(results)}, with differences or errors: {len(differing)}")
+    log("=" * 60)